@@ -0,0 +1,74 @@
+"""
+This file is part of Nurse Scheduling Project, see <https://github.com/j3soon/nurse-scheduling>.
+
+Copyright (C) 2023-2025 Johnson Sun
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as
+published by the Free Software Foundation, either version 3 of the
+License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+# Benchmark of the solve time of the fairness expressions of shift count.
+# Usage (in the `core` directory):
+#   python -m benchmarks.shift_count_fairness [--people 10 15] [--days 28] [--timeout 60]
+
+import argparse
+import logging
+
+from nurse_scheduling import scheduler
+from nurse_scheduling.models import NurseSchedulingData
+from nurse_scheduling.profiler import Profiler
+
+EXPRESSIONS = ['|x - T|^2', '|x - T|^2 (linearized)', '|x - T|', 'max(|x - T|)']
+
+def create_scenario(n_people: int, n_days: int, expression: str) -> NurseSchedulingData:
+    # Nurses with conflicting shift requests, where the number of shifts and
+    # night shifts of each nurse should be close to the average.
+    return NurseSchedulingData(
+        apiVersion='alpha',
+        dates={'range': {'startDate': '2024-01-01', 'endDate': f'2024-01-{n_days:02d}'}},
+        people={'items': [{'id': p} for p in range(n_people)]},
+        shiftTypes={'items': [{'id': 'D'}, {'id': 'E'}, {'id': 'N'}]},
+        preferences=[
+            {'type': 'at most one shift per day'},
+            {'type': 'shift type requirement', 'shiftType': ['D', 'E', 'N'], 'requiredNumPeople': 2},
+            {'type': 'shift type successions', 'person': 'ALL', 'pattern': ['N', 'D'], 'weight': -100},
+            *[
+                {'type': 'shift request', 'person': p, 'date': f'2024-01-{d:02d}', 'shiftType': 'OFF', 'weight': 3}
+                for p in range(n_people) for d in range(1, n_days + 1) if (p * 7 + d * 3) % 5 == 0
+            ],
+            {'type': 'shift count', 'person': 'ALL', 'countDates': 'ALL', 'countShiftTypes': ['D', 'E', 'N'],
+             'expression': expression, 'target': 'round(AVG_SHIFTS_PER_PERSON)', 'weight': -10},
+            {'type': 'shift count', 'person': 'ALL', 'countDates': 'ALL', 'countShiftTypes': 'N',
+             'expression': expression, 'target': n_days * 2 // n_people, 'weight': -10},
+        ],
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description='Shift count fairness benchmark')
+    parser.add_argument('--people', type=int, nargs='+', default=[10, 15])
+    parser.add_argument('--days', type=int, default=28)
+    parser.add_argument('--timeout', type=int, default=60)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    print(f"{'people':>6} {'expression':>24} {'status':>8} {'score':>6} {'solve time (s)':>14} {'conflicts':>10}")
+    for n_people in args.people:
+        for expression in EXPRESSIONS:
+            scenario = create_scenario(n_people, args.days, expression)
+            profiler = Profiler()
+            _, _, score, status, _ = scheduler.schedule(scenario, deterministic=True, timeout=args.timeout, profiler=profiler)
+            record = next(record for record in profiler.records if record['phase'] == 'solve')
+            print(f"{n_people:>6} {expression:>24} {status:>8} {score:>6} {record['solver_wall_time']:>14.2f} {record['conflicts']:>10}")
+
+if __name__ == '__main__':
+    main()
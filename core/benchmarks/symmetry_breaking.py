@@ -0,0 +1,71 @@
+"""
+This file is part of Nurse Scheduling Project, see <https://github.com/j3soon/nurse-scheduling>.
+
+Copyright (C) 2023-2025 Johnson Sun
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as
+published by the Free Software Foundation, either version 3 of the
+License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+# Benchmark of the time to prove optimality with and without symmetry breaking.
+# Usage (in the `core` directory):
+#   python -m benchmarks.symmetry_breaking [--people 8 10 12] [--days 7] [--max-nights 1] [--timeout 60]
+
+import argparse
+import logging
+
+from nurse_scheduling import scheduler
+from nurse_scheduling.models import NurseSchedulingData
+from nurse_scheduling.profiler import Profiler
+
+def create_scenario(n_people: int, n_days: int, max_nights: int) -> NurseSchedulingData:
+    # Nurses that are all interchangeable, where the night shifts cannot be
+    # spread evenly enough to keep everyone below `max_nights` nights.
+    # Proving this requires a counting argument that is hard for the solver
+    # when it must consider every permutation of the nurses.
+    return NurseSchedulingData(
+        apiVersion='alpha',
+        dates={'range': {'startDate': '2024-01-01', 'endDate': f'2024-01-{n_days:02d}'}},
+        people={'items': [{'id': p} for p in range(n_people)]},
+        shiftTypes={'items': [{'id': 'D'}, {'id': 'E'}, {'id': 'N'}]},
+        preferences=[
+            {'type': 'at most one shift per day'},
+            {'type': 'shift type requirement', 'shiftType': ['D', 'E', 'N'], 'requiredNumPeople': 2},
+            {'type': 'shift type successions', 'person': 'ALL', 'pattern': ['N', 'D'], 'weight': '-inf'},
+            {'type': 'shift type successions', 'person': 'ALL', 'pattern': ['N', 'E'], 'weight': '-inf'},
+            {'type': 'shift count', 'person': 'ALL', 'countDates': 'ALL', 'countShiftTypes': 'N',
+             'expression': 'x <= T', 'target': max_nights, 'weight': 10},
+        ],
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description='Symmetry breaking benchmark')
+    parser.add_argument('--people', type=int, nargs='+', default=[8, 10, 12])
+    parser.add_argument('--days', type=int, default=7)
+    parser.add_argument('--max-nights', type=int, default=1)
+    parser.add_argument('--timeout', type=int, default=60)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    print(f"{'people':>6} {'symmetry breaking':>17} {'status':>8} {'score':>6} {'solve time (s)':>14} {'conflicts':>10}")
+    for n_people in args.people:
+        scenario = create_scenario(n_people, args.days, args.max_nights)
+        for symmetry_breaking in (False, True):
+            profiler = Profiler()
+            _, _, score, status, _ = scheduler.schedule(
+                scenario, deterministic=True, timeout=args.timeout, profiler=profiler, symmetry_breaking=symmetry_breaking)
+            record = next(record for record in profiler.records if record['phase'] == 'solve')
+            print(f"{n_people:>6} {str(symmetry_breaking):>17} {status:>8} {score:>6} {record['solver_wall_time']:>14.2f} {record['conflicts']:>10}")
+
+if __name__ == '__main__':
+    main()
@@ -17,4 +17,5 @@ You should have received a copy of the GNU Affero General Public License
 along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 
-from nurse_scheduling.scheduler import schedule
+from nurse_scheduling.scheduler import schedule, schedule_top_k
+from nurse_scheduling.result import ScheduleResult
@@ -0,0 +1,126 @@
+"""
+This file is part of Nurse Scheduling Project, see <https://github.com/j3soon/nurse-scheduling>.
+
+Copyright (C) 2023-2025 Johnson Sun
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as
+published by the Free Software Foundation, either version 3 of the
+License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+# Batch scheduling of many scenario files in a process pool.
+
+import concurrent.futures
+import glob
+import json
+import logging
+import os
+import time
+import traceback
+from typing import Any, Dict, List
+
+from . import exporter, scheduler
+
+SUMMARY_FILENAME = "summary.jsonl"
+
+def resolve_input_paths(pattern: str) -> List[str]:
+    """Returns the scenario files in the directory `pattern`, or matching the glob `pattern`."""
+    if os.path.isdir(pattern):
+        paths = glob.glob(os.path.join(pattern, "*.yaml")) + glob.glob(os.path.join(pattern, "*.yml"))
+    else:
+        paths = glob.glob(pattern)
+    paths = sorted(path for path in paths if os.path.isfile(path))
+    if not paths:
+        raise ValueError(f"No scenario files found for '{pattern}'")
+    return paths
+
+def _output_path(filepath: str, output_dir: str, output_format: str) -> str:
+    return os.path.join(output_dir, f"{os.path.splitext(os.path.basename(filepath))[0]}.{output_format}")
+
+def _schedule_one(filepath: str, output_path: str, output_format: str, prettify: bool, timeout: int | None,
+                  num_workers: int, cache_dir: str | None, solver_profile: str | None, solver_parameters: Dict[str, Any] | None,
+                  symmetry_breaking: bool = False) -> Dict[str, Any]:
+    # Runs in a worker process, and never raises so that one bad scenario does not abort the batch
+    start_time = time.perf_counter()
+    record = {
+        'input': filepath, 'output': None, 'status': None, 'score': None, 'error': None,
+        'num_workers': num_workers, 'solver_profile': solver_profile, 'solver_parameters': solver_parameters or {},
+        'symmetry_breaking': symmetry_breaking,
+    }
+    try:
+        df, solution, score, status, cell_export_info = scheduler.schedule(
+            filepath, prettify=prettify, timeout=timeout, cache_dir=cache_dir, num_workers=num_workers,
+            solver_profile=solver_profile, solver_parameters=solver_parameters, symmetry_breaking=symmetry_breaking)
+        record['status'] = status
+        if df is not None:
+            if output_format == 'xlsx':
+                exporter.export_to_excel(df, output_path, cell_export_info)
+            else:
+                exporter.export_to_csv(df, output_path)
+            record['output'] = output_path
+            record['score'] = score
+    except Exception as e:
+        logging.debug(traceback.format_exc())
+        record['error'] = f"{type(e).__name__}: {e}"
+    record['wall_time'] = time.perf_counter() - start_time
+    return record
+
+def schedule_batch(filepaths: List[str], output_dir: str, output_format: str = 'csv', prettify: bool = False,
+                   timeout: int | None = None, max_jobs: int | None = None, cache_dir: str | None = None,
+                   solver_profile: str | None = None, solver_parameters: Dict[str, Any] | None = None,
+                   symmetry_breaking: bool = False) -> List[Dict[str, Any]]:
+    """Schedules each scenario in `filepaths` concurrently, and writes the results to `output_dir`.
+
+    Up to `max_jobs` scenarios (defaults to the number of cores) are solved
+    at the same time in separate processes, and the available cores are
+    split evenly between the concurrent solves through the CP-SAT
+    `num_workers` parameter. Each result is exported to
+    `<output_dir>/<scenario name>.<output_format>`, and a summary line is
+    appended to `<output_dir>/summary.jsonl` as soon as each scenario
+    finishes, so a slow scenario does not hold back the others. Failed
+    scenarios are recorded in the summary with an `error` instead of raising.
+    The solver options passed to each solve are recorded in the summary as
+    well, see `scheduler.schedule_top_k` for how they are combined.
+
+    Returns the summary records in the order of `filepaths`.
+    """
+    if max_jobs is not None and max_jobs < 1:
+        raise ValueError(f"max_jobs must be positive, but got {max_jobs}")
+    if output_format not in ('csv', 'xlsx'):
+        raise ValueError(f"Unsupported output format '{output_format}'. Supported formats: csv, xlsx")
+    if prettify and output_format == 'csv':
+        raise ValueError("Prettify mode is not supported for CSV files")
+    output_paths = [_output_path(filepath, output_dir, output_format) for filepath in filepaths]
+    if len(set(output_paths)) != len(output_paths):
+        raise ValueError("Scenario files in a batch must have distinct file names")
+    n_cores = os.cpu_count() or 1
+    max_jobs = max(1, min(max_jobs or n_cores, len(filepaths)))
+    num_workers = max(1, n_cores // max_jobs)
+    logging.info(f"Scheduling {len(filepaths)} scenarios with {max_jobs} concurrent solves of {num_workers} workers each...")
+
+    os.makedirs(output_dir, exist_ok=True)
+    summary_path = os.path.join(output_dir, SUMMARY_FILENAME)
+    records = {}
+    with open(summary_path, 'w', encoding='utf-8') as summary_file, \
+            concurrent.futures.ProcessPoolExecutor(max_workers=max_jobs) as executor:
+        futures = {
+            executor.submit(_schedule_one, filepath, output_path, output_format, prettify, timeout, num_workers, cache_dir,
+                            solver_profile, solver_parameters, symmetry_breaking): filepath
+            for filepath, output_path in zip(filepaths, output_paths)
+        }
+        for future in concurrent.futures.as_completed(futures):
+            record = future.result()
+            records[futures[future]] = record
+            logging.info(f"Finished '{record['input']}' ({len(records)}/{len(filepaths)}): {record['error'] or record['status']}")
+            summary_file.write(json.dumps(record) + "\n")
+            summary_file.flush()
+    return [records[filepath] for filepath in filepaths]
@@ -0,0 +1,154 @@
+"""
+This file is part of Nurse Scheduling Project, see <https://github.com/j3soon/nurse-scheduling>.
+
+Copyright (C) 2023-2025 Johnson Sun
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as
+published by the Free Software Foundation, either version 3 of the
+License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+# On-disk cache of built CP-SAT models.
+# Each entry is a single `.npz` file (loaded without pickle) containing the
+# serialized `CpModelProto`, the index arrays of the shift and off variables,
+# the names and indices of the other named variables, and the columns of the
+# report table.
+
+import functools
+import glob
+import hashlib
+import json
+import logging
+import os
+import tempfile
+
+import numpy as np
+import ortools
+from ortools.sat.python import cp_model
+
+from .context import Context
+from .report import ReportTable
+from .models import NurseSchedulingData
+from .variables import BoolVarArray
+
+CACHE_FORMAT_VERSION = 3
+DEFAULT_CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+@functools.lru_cache(maxsize=1)
+def _library_version() -> str:
+    # There is no release version to rely on, so hash the package sources
+    # to invalidate the cache whenever the model building code changes.
+    h = hashlib.sha256()
+    package_dir = os.path.dirname(os.path.realpath(__file__))
+    for path in sorted(glob.glob(f"{package_dir}/**/*.py", recursive=True)):
+        h.update(os.path.relpath(path, package_dir).encode())
+        with open(path, 'rb') as f:
+            h.update(f.read())
+    return f"{CACHE_FORMAT_VERSION}-{ortools.__version__}-{h.hexdigest()}"
+
+def cache_key(scenario: NurseSchedulingData, **options) -> str:
+    """Returns the cache key of the model built from `scenario` with the given build options."""
+    h = hashlib.sha256()
+    h.update(_library_version().encode())
+    # Note that `model_dump_json` cannot be used, since it serializes both
+    # `.inf` and `-.inf` weights as `null`.
+    # The solver configuration only affects the solve, not the built model.
+    h.update(json.dumps(scenario.model_dump(exclude={'solver'}), sort_keys=True, default=str).encode())
+    h.update(json.dumps(options, sort_keys=True, default=str).encode())
+    return h.hexdigest()
+
+def _entry_path(cache_dir: str, key: str) -> str:
+    return os.path.join(cache_dir, f"{key}.npz")
+
+def load_model(ctx: Context, cache_dir: str, key: str) -> bool:
+    """Restores the model, variables (including `model_vars`), objective, and reports of `ctx` from the cache.
+
+    Returns False if there is no valid entry for `key`.
+    """
+    path = _entry_path(cache_dir, key)
+    try:
+        with np.load(path, allow_pickle=False) as entry:
+            model_proto = entry['model_proto'].tobytes()
+            shifts_index, shifts_mask = entry['shifts_index'], entry['shifts_mask']
+            offs_index, offs_mask = entry['offs_index'], entry['offs_mask']
+            model_vars_names, model_vars_index = entry['model_vars_names'], entry['model_vars_index']
+            reports = ReportTable.from_arrays({
+                name: entry[f"reports_{name}"] for name in ReportTable.COLUMNS + ('kinds',)
+            })
+    except FileNotFoundError:
+        return False
+    except Exception as e:
+        logging.warning(f"Ignoring corrupted model cache entry '{path}': {e}")
+        return False
+    ctx.model = cp_model.CpModel()
+    ctx.model.proto.ParseFromString(model_proto)
+    ctx.model.rebuild_var_and_constant_map()
+    ctx.shifts = BoolVarArray.from_index(ctx.model, "shift_d{}_s{}_p{}", shifts_index, shifts_mask)
+    ctx.offs = BoolVarArray.from_index(ctx.model, "off_d{}_p{}", offs_index, offs_mask)
+    ctx.model_vars = {
+        name: ctx.model.get_int_var_from_proto_index(index)
+        for name, index in zip(model_vars_names.tolist(), model_vars_index.tolist())
+    }
+    ctx.reports = reports
+    # Rebuild the objective expression from the proto, where a maximization
+    # is stored as a minimization with a negative scaling factor.
+    objective = ctx.model.proto.objective
+    scaling_factor = int(objective.scaling_factor) if objective.scaling_factor else 1
+    ctx.objective = cp_model.LinearExpr.weighted_sum(
+        [ctx.model.get_int_var_from_proto_index(v) for v in objective.vars],
+        [c * scaling_factor for c in objective.coeffs],
+    ) + int(objective.offset) * scaling_factor
+    # Mark the entry as recently used for the eviction policy
+    os.utime(path)
+    return True
+
+def save_model(ctx: Context, cache_dir: str, key: str, max_bytes: int = DEFAULT_CACHE_MAX_BYTES):
+    """Stores the built model of `ctx` in the cache, and evicts the least recently used entries beyond `max_bytes`."""
+    os.makedirs(cache_dir, exist_ok=True)
+    # Write to a temporary file first, so that concurrent readers never see a partial entry
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            np.savez(
+                f,
+                model_proto=np.frombuffer(ctx.model.proto.SerializeToString(), dtype=np.uint8),
+                shifts_index=ctx.shifts.index, shifts_mask=ctx.shifts.mask,
+                offs_index=ctx.offs.index, offs_mask=ctx.offs.mask,
+                model_vars_names=np.array(list(ctx.model_vars.keys()), dtype=str),
+                model_vars_index=np.array([var.Index() for var in ctx.model_vars.values()], dtype=np.int64),
+                **{f"reports_{name}": array for name, array in ctx.reports.to_arrays().items()},
+            )
+        os.replace(tmp_path, _entry_path(cache_dir, key))
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    evict(cache_dir, max_bytes)
+
+def evict(cache_dir: str, max_bytes: int):
+    """Removes the least recently used entries until the cache is at most `max_bytes`."""
+    entries = []
+    for path in glob.glob(os.path.join(cache_dir, "*.npz")):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        logging.info(f"Evicting model cache entry '{path}'")
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
@@ -21,22 +21,60 @@ import sys
 import argparse
 import logging
 import os.path
-from . import scheduler, exporter
+from . import batch, decompose, diagnose, rolling, scheduler, exporter, solver_profiles
+from .profiler import Profiler
 
 # TODO: Better CLI
 # Ref: https://packaging.python.org/en/latest/guides/creating-command-line-tools/
 
 def main():
     parser = argparse.ArgumentParser(description='Nurse Scheduling Tool')
-    parser.add_argument('input_file_path', help='Path to the input file')
-    parser.add_argument('output_path', nargs='?', help='Path to save the output file (optional)')
+    parser.add_argument('input_file_path', help='Path to the input file (or a directory/glob of input files in batch mode)')
+    parser.add_argument('output_path', nargs='?', help='Path to save the output file (optional, or the output directory in batch mode)')
     parser.add_argument('--prettify', action='store_true',
                        help='Enable prettify mode for enhanced output formatting')
     parser.add_argument('-v', '--verbose', action='count', default=0,
                        help='Increase verbosity (can be used multiple times: -v, -vv, -vvv)')
     parser.add_argument('--timeout', type=int, default=None,
                        help='Maximum running time in seconds. If reached, the solver will stop and the current best result (if any) will be exported.')
+    parser.add_argument('--profile', metavar='PROFILE_PATH', default=None,
+                       help='Profile each phase and preference of the model build and solve, and save the report to a JSON file.')
+    parser.add_argument('--profile-memory', action='store_true',
+                       help='Also trace the peak Python memory of each phase with --profile (slows down the profiled phases considerably).')
     
+    parser.add_argument('--cache-dir', default=None,
+                       help='Directory for caching built models. Re-running an unchanged scenario skips the model build.')
+
+    parser.add_argument('--hint', metavar='HINT_PATH', default=None,
+                       help='Previously exported CSV/XLSX roster used as a solution hint (warm start) for the solver.')
+
+    parser.add_argument('--solver-profile', choices=list(solver_profiles.SOLVER_PROFILES), default=None,
+                       help="Named CP-SAT parameter profile. Overrides the scenario's solver.profile.")
+    parser.add_argument('--solver-param', metavar='KEY=VALUE', action='append', default=[],
+                       help='Raw CP-SAT parameter override, e.g., --solver-param linearization_level=2 (can be used multiple times).')
+
+    parser.add_argument('--dump', metavar='DUMP_PATH', default=None,
+                       help='Save the values of all named variables of the solution to a JSON Lines file, e.g., for debugging.')
+
+    parser.add_argument('--symmetry-breaking', action='store_true',
+                       help='Order the shift assignments of interchangeable people (same preferences, groups, and history), which may speed up proving optimality.')
+
+    parser.add_argument('--rolling-window', metavar='DAYS', type=int, default=None,
+                       help='Rolling-horizon mode: solve overlapping windows of DAYS days in sequence, for long planning periods. Not supported with --batch, --hint, --cache-dir, or --profile.')
+    parser.add_argument('--rolling-commit', metavar='DAYS', type=int, default=None,
+                       help='Number of days committed after solving each window in rolling-horizon mode (defaults to half of the window).')
+
+    parser.add_argument('--decompose', action='store_true',
+                       help='Schedule independent sub-rosters (people that share no preferences) as separate models concurrently. Not supported with --batch, --hint, --cache-dir, --profile, or --rolling-window.')
+
+    parser.add_argument('--diagnose', action='store_true',
+                       help='Diagnose mode: if the scenario is infeasible, print a small set of conflicting preferences (and dates) instead of scheduling.')
+
+    parser.add_argument('--batch', action='store_true',
+                       help='Batch mode: schedule every scenario in the input directory/glob concurrently, and save the results and a summary.jsonl to the output directory.')
+    parser.add_argument('--jobs', type=int, default=None,
+                       help='Maximum number of concurrent solves in batch or decompose mode (defaults to the number of CPU cores). The cores are split between the solves.')
+
     args = parser.parse_args()
     filepath = args.input_file_path
     output_path = args.output_path
@@ -51,6 +89,69 @@ def main():
     else:
         logging.basicConfig(level=logging.WARNING, format='%(levelname)s: %(message)s')
     
+    solver_parameters = {}
+    for param in args.solver_param:
+        key, sep, value = param.partition('=')
+        if not sep:
+            print(f"Error: Invalid solver parameter '{param}', expected KEY=VALUE")
+            sys.exit(1)
+        solver_parameters[key.strip()] = value.strip()
+
+    if args.diagnose:
+        try:
+            conflicts = diagnose.diagnose(filepath, timeout=args.timeout)
+        except ValueError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        if conflicts is None:
+            print("Unable to decide feasibility within the time limit")
+        elif not conflicts:
+            print("The scenario is feasible")
+        else:
+            print("The scenario is infeasible due to the following conflicting preferences:")
+            for conflict in conflicts:
+                date = f" on {conflict['date']}" if conflict['date'] is not None else ""
+                description = f" ({conflict['description']})" if conflict['description'] else ""
+                print(f"  - preferences[{conflict['preference_idx']}]: {conflict['type']}{description}{date}")
+        sys.exit(0)
+
+    if args.profile_memory and not args.profile:
+        print("Error: --profile-memory requires --profile")
+        sys.exit(1)
+
+    if args.jobs is not None and args.jobs < 1:
+        print(f"Error: --jobs must be positive, but got {args.jobs}")
+        sys.exit(1)
+
+    if args.rolling_window is not None and (args.batch or args.hint or args.cache_dir or args.profile):
+        print("Error: Rolling-horizon mode is not supported with --batch, --hint, --cache-dir, or --profile")
+        sys.exit(1)
+
+    if args.decompose and (args.batch or args.hint or args.cache_dir or args.profile or args.rolling_window is not None):
+        print("Error: Decompose mode is not supported with --batch, --hint, --cache-dir, --profile, or --rolling-window")
+        sys.exit(1)
+
+    if args.dump and (args.batch or args.rolling_window is not None or args.decompose):
+        print("Error: --dump is not supported with --batch, --rolling-window, or --decompose")
+        sys.exit(1)
+
+    if args.batch:
+        if not output_path:
+            print("Error: Output directory is required in batch mode")
+            sys.exit(1)
+        try:
+            filepaths = batch.resolve_input_paths(filepath)
+        except ValueError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        records = batch.schedule_batch(filepaths, output_path, output_format='xlsx' if prettify else 'csv', prettify=prettify,
+            timeout=args.timeout, max_jobs=args.jobs, cache_dir=args.cache_dir,
+            solver_profile=args.solver_profile, solver_parameters=solver_parameters, symmetry_breaking=args.symmetry_breaking)
+        for record in records:
+            print(f"{record['input']}: {record['error'] or record['status']}")
+        print(f"Results saved to {output_path}")
+        sys.exit(1 if any(record['error'] for record in records) else 0)
+
     # Infer output format from file extension
     output_format = None
     if output_path:
@@ -66,7 +167,22 @@ def main():
             print(f"Error: Unsupported output file extension '{file_ext}'. Supported formats: .csv, .xlsx")
             sys.exit(1)
     
-    df, solution, score, status, cell_export_info = scheduler.schedule(filepath, prettify=prettify, timeout=args.timeout)
+    profiler = Profiler(trace_memory=args.profile_memory) if args.profile else None
+    if args.decompose:
+        df, solution, score, status, cell_export_info = decompose.schedule_decomposed(filepath, prettify=prettify, timeout=args.timeout,
+            max_jobs=args.jobs, solver_profile=args.solver_profile, solver_parameters=solver_parameters,
+            symmetry_breaking=args.symmetry_breaking)
+    elif args.rolling_window is not None:
+        df, solution, score, status, cell_export_info = rolling.schedule_rolling(filepath, args.rolling_window, args.rolling_commit,
+            prettify=prettify, timeout=args.timeout, solver_profile=args.solver_profile, solver_parameters=solver_parameters,
+            symmetry_breaking=args.symmetry_breaking)
+    else:
+        df, solution, score, status, cell_export_info = scheduler.schedule(filepath, prettify=prettify, timeout=args.timeout, profiler=profiler,
+            cache_dir=args.cache_dir, hint_solution=args.hint, solver_profile=args.solver_profile, solver_parameters=solver_parameters,
+            symmetry_breaking=args.symmetry_breaking, dump_path=args.dump)
+    if profiler is not None:
+        profiler.to_json(args.profile)
+        print(f"Profile saved to {args.profile}")
 
     if df is None:
         print("No solution found")
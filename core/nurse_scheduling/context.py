@@ -18,14 +18,15 @@ along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 
 from ortools.sat.python import cp_model
-from typing import Dict, List
+from typing import Dict, List, Tuple
 from datetime import date
 from pydantic import ConfigDict, Field
 
 from .models import (
     NurseSchedulingData,
 )
-from .report import Report
+from .report import ReportTable
+from .variables import BoolVarArray
 
 class Context(NurseSchedulingData):
     model_config = ConfigDict(arbitrary_types_allowed=True)
@@ -43,23 +44,28 @@ class Context(NurseSchedulingData):
     # Fields used by the CP-SAT solver
     model: cp_model.CpModel = Field(default_factory=cp_model.CpModel)
     model_vars: Dict[str, cp_model.IntVar] = Field(default_factory=dict)
-    shifts: Dict[tuple[int, int, int], cp_model.IntVar] = Field(default_factory=dict)
-    """A set of indicator variables (shifts[(d, s, p)]) that are 1 if
-    and only if a person (p) is assigned to a shift type (s) on day (d)."""
-    offs: Dict[tuple[int, int], cp_model.IntVar] = Field(default_factory=dict)
-    """A set of indicator variables (offs[(d, p)]) that are 1 if and
+    shifts: BoolVarArray | None = None
+    """A D×S×P array of indicator variables (shifts[(d, s, p)]) that are 1 if
+    and only if a person (p) is assigned to a shift type (s) on day (d).
+    Use `shifts.mask` for lookups such as the people that can work (d, s)."""
+    offs: BoolVarArray | None = None
+    """A D×P array of indicator variables (offs[(d, p)]) that are 1 if and
     only if a person (p) is off on day (d)."""
+    subexpressions: Dict[tuple, cp_model.IntVar | cp_model.LinearExpr] = Field(default_factory=dict)
+    """Shared literals, integer variables, and linear expressions of common subexpressions,
+    keyed by their kind and canonical (days, people, shift types) index tuples.
+    Use `utils.any_assigned` and `utils.count_assigned` to build them."""
+    subexpression_uses: Dict[tuple, int] = Field(default_factory=dict)
+    """The number of times each shared count in `subexpressions` is used."""
+    assumptions: Dict[Tuple[int, int | None], cp_model.IntVar] | None = None
+    """In diagnose mode, the assumption literals that guard the hard
+    constraints of each (preference index, day), where the day is None for
+    constraints that span multiple days. None otherwise."""
 
     # Results and reporting
-    reports: List[Report] = Field(default_factory=list)
+    reports: ReportTable = Field(default_factory=ReportTable)
+    """The reports of all preferences, which are evaluated on the solution."""
     solver_status: str | None = None
     
-    # Lookup maps
-    map_ds_p: Dict[tuple[int, int], set[int]] = Field(default_factory=dict)  # Maps (day, shift_type) to set of people
-    map_dp_s: Dict[tuple[int, int], set[int]] = Field(default_factory=dict)  # Maps (day, person) to set of shift types
-    map_d_sp: Dict[int, set[tuple[int, int]]] = Field(default_factory=dict)  # Maps day to set of (shift_type, person) pairs
-    map_s_dp: Dict[int, set[tuple[int, int]]] = Field(default_factory=dict)  # Maps shift_type to set of (day, person) pairs
-    map_p_ds: Dict[int, set[tuple[int, int]]] = Field(default_factory=dict)  # Maps person to set of (day, shift_type) pairs
-    
     # Optimization objective
     objective: cp_model.LinearExpr = 0
@@ -0,0 +1,182 @@
+"""
+This file is part of Nurse Scheduling Project, see <https://github.com/j3soon/nurse-scheduling>.
+
+Copyright (C) 2023-2025 Johnson Sun
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as
+published by the Free Software Foundation, either version 3 of the
+License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+# Decomposition of scenarios into independent sub-rosters.
+# People are connected if a preference couples their shift assignments, and
+# each connected component is scheduled as a separate model.
+
+import concurrent.futures
+import itertools
+import logging
+import os
+from typing import Dict, List, Tuple
+
+from . import models, preference_types, scheduler, utils
+from .context import Context
+from .models import NurseSchedulingData
+from .result import ScheduleResult
+
+def _find(parent: List[int], p: int) -> int:
+    while parent[p] != p:
+        parent[p] = parent[parent[p]]
+        p = parent[p]
+    return p
+
+def _union(parent: List[int], ps):
+    ps = [_find(parent, p) for p in ps]
+    for p in ps[1:]:
+        parent[p] = ps[0]
+
+def _parse_nested_pids(ctx: Context, elements) -> List[int]:
+    return sorted(set(itertools.chain.from_iterable(
+        utils.parse_pids(pid, ctx.map_pid_p)
+        for element in elements for pid in (element if isinstance(element, list) else [element])
+    )))
+
+def find_components(ctx: Context) -> List[List[int]]:
+    """Returns the groups of person indices whose shift assignments are independent of each other.
+
+    Only `shift type requirement` (through the people that may fill the same
+    shift), `shift affinity`, and `shift count` with `max(|x - T|)` (through
+    the largest deviation of its people) couple different people, all other
+    preference types are per person.
+    """
+    parent = list(range(ctx.n_people))
+    for preference in ctx.preferences:
+        if preference.type == models.SHIFT_TYPE_REQUIREMENT:
+            if preference.qualifiedPeople is None:
+                _union(parent, range(ctx.n_people))
+            else:
+                _union(parent, utils.parse_pids(preference.qualifiedPeople, ctx.map_pid_p))
+        elif preference.type == models.SHIFT_AFFINITY:
+            _union(parent, _parse_nested_pids(ctx, list(preference.people1) + list(preference.people2)))
+        elif preference.type == models.SHIFT_COUNT:
+            if preference_types.MINIMAX_EXPRESSION in utils.ensure_list(preference.expression):
+                _union(parent, utils.parse_pids(preference.person, ctx.map_pid_p))
+    components = {}
+    for p in range(ctx.n_people):
+        components.setdefault(_find(parent, p), []).append(p)
+    return sorted(components.values())
+
+def _component_scenario(scenario: NurseSchedulingData, ctx: Context, ps: List[int]) -> NurseSchedulingData:
+    ps_set = set(ps)
+    pids = [ctx.people.items[p].id for p in ps]
+    group_ids = {group.id for group in ctx.people.groups}
+    people = ctx.people.model_copy(update={
+        'items': [ctx.people.items[p] for p in ps],
+        # Keep nested groups, so that group references in preferences remain valid
+        'groups': [
+            group.model_copy(update={'members': [
+                member for member in group.members if member in group_ids or member in pids
+            ]})
+            for group in ctx.people.groups
+        ],
+    })
+    total_shifts = preference_types.get_total_shifts(ctx)
+    preferences = []
+    for preference in ctx.preferences:
+        if preference.type in (models.SHIFT_REQUEST, models.SHIFT_TYPE_SUCCESSIONS, models.SHIFT_COUNT):
+            pref_ps = [p for p in utils.parse_pids(preference.person, ctx.map_pid_p) if p in ps_set]
+            if not pref_ps:
+                continue
+            update = {'person': [ctx.people.items[p].id for p in pref_ps]}
+            if preference.type == models.SHIFT_COUNT:
+                # Resolve the targets that depend on all people
+                update['target'] = [
+                    preference_types.get_shift_count_target(ctx, target, total_shifts)
+                    for target in utils.ensure_list(preference.target)
+                ]
+                update['expression'] = utils.ensure_list(preference.expression)
+            preferences.append(preference.model_copy(update=update))
+        elif preference.type == models.SHIFT_TYPE_REQUIREMENT:
+            if preference.qualifiedPeople is None or \
+                    set(utils.parse_pids(preference.qualifiedPeople, ctx.map_pid_p)) & ps_set:
+                # All qualified people are in this component
+                preferences.append(preference)
+            else:
+                # Keep excluding the unqualified people of this component from the shift
+                preferences.append(preference.model_copy(update={
+                    'requiredNumPeople': 0, 'preferredNumPeople': None, 'qualifiedPeople': [],
+                }))
+        elif preference.type == models.SHIFT_AFFINITY:
+            if set(_parse_nested_pids(ctx, list(preference.people1) + list(preference.people2))) <= ps_set:
+                preferences.append(preference)
+        else:
+            preferences.append(preference)
+    return scenario.model_copy(update={'people': people, 'preferences': preferences})
+
+def _schedule_component(scenario: NurseSchedulingData, solver_options: dict) -> Tuple[Dict[Tuple[int, int, int], int] | None, str]:
+    # Runs in a worker process, only the solution is sent back
+    _, solution, _, status, _ = scheduler.schedule(scenario, **solver_options)
+    return solution, status
+
+def schedule_decomposed(filepath: str | NurseSchedulingData, deterministic=False, prettify=False, timeout: int | None = None,
+                        max_jobs: int | None = None, solver_profile: str | None = None, solver_parameters: dict | None = None,
+                        symmetry_breaking: bool = False):
+    """Schedule each independent sub-roster (see `find_components`) as a separate model.
+
+    Up to `max_jobs` components (defaults to the number of cores) are solved
+    concurrently in separate processes, and the cores are split between the
+    concurrent solves. The merged schedule is evaluated against the model of
+    the whole scenario, and returned in the same format as `schedule`. Since
+    the components are independent, the merged schedule is optimal if and
+    only if the schedule of every component is optimal.
+
+    `symmetry_breaking` applies to the solve of each component (see
+    `scheduler.schedule_top_k`), but not to the evaluation of the merged
+    schedule, since it may swap people across the symmetry-breaking order.
+    """
+    if max_jobs is not None and max_jobs < 1:
+        raise ValueError(f"max_jobs must be positive, but got {max_jobs}")
+    if isinstance(filepath, NurseSchedulingData):
+        scenario = filepath
+    else:
+        logging.info(f"Loading scenario from '{filepath}'...")
+        scenario = NurseSchedulingData(**scheduler.load_yaml(filepath))
+    ctx = scheduler.create_context(scenario)
+    solver_options = dict(
+        deterministic=deterministic, timeout=timeout, solver_profile=solver_profile, solver_parameters=solver_parameters,
+    )
+    components = find_components(ctx)
+    logging.info(f"Found {len(components)} independent components with {[len(ps) for ps in components]} people")
+    if len(components) == 1:
+        return scheduler.schedule(scenario, prettify=prettify, symmetry_breaking=symmetry_breaking, **solver_options)
+
+    n_cores = os.cpu_count() or 1
+    max_jobs = min(max_jobs or n_cores, len(components))
+    component_options = dict(solver_options, num_workers=max(1, n_cores // max_jobs), symmetry_breaking=symmetry_breaking)
+    scenarios = [_component_scenario(scenario, ctx, ps) for ps in components]
+    if max_jobs == 1:
+        results = [_schedule_component(component, component_options) for component in scenarios]
+    else:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=max_jobs) as executor:
+            results = list(executor.map(_schedule_component, scenarios, itertools.repeat(component_options)))
+
+    solution = {}
+    for ps, (component_solution, status) in zip(components, results):
+        if component_solution is None:
+            logging.warning(f"No solution found for the component with people {[ctx.people.items[p].id for p in ps]}")
+            return ScheduleResult(ctx, status)
+        for (d, s, p), value in component_solution.items():
+            solution[(d, s, ps[p])] = value
+    is_optimal = all(status == 'OPTIMAL' for _, status in results)
+    logging.info("Evaluating the merged schedule on the whole scenario...")
+    return scheduler.schedule(
+        scenario, prettify=prettify, fixed_solution=solution,
+        fixed_solution_status='OPTIMAL' if is_optimal else 'FEASIBLE', **solver_options)
@@ -0,0 +1,84 @@
+"""
+This file is part of Nurse Scheduling Project, see <https://github.com/j3soon/nurse-scheduling>.
+
+Copyright (C) 2023-2025 Johnson Sun
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as
+published by the Free Software Foundation, either version 3 of the
+License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+# Diagnosis of infeasible scenarios.
+# Each group of hard constraints (per preference and day) is guarded by an
+# assumption literal, and the solver returns a subset of the assumptions
+# that is sufficient for infeasibility, i.e., a set of conflicting preferences.
+
+import logging
+from typing import Any, Dict, List
+
+from ortools.sat.python import cp_model
+
+from . import scheduler
+from .models import NurseSchedulingData
+from .profiler import Profiler
+
+def diagnose(filepath: str | NurseSchedulingData, timeout: int | None = None) -> List[Dict[str, Any]] | None:
+    """Returns a small set of conflicting hard constraints if the scenario is infeasible.
+
+    Each conflict is a dict with the `preference_idx` (index in the
+    `preferences` list of the scenario), the preference `type` and
+    `description`, and the `date` (None if the constraint spans multiple
+    days). The set is found in a single solve, and is not guaranteed to be
+    minimal. Returns an empty list if the scenario is feasible, and None if
+    the solver could not decide within `timeout` (i.e., the status is
+    UNKNOWN). Any other status (e.g., MODEL_INVALID) raises a `ValueError`.
+    """
+    if isinstance(filepath, NurseSchedulingData):
+        scenario = filepath
+    else:
+        logging.info(f"Loading scenario from '{filepath}'...")
+        scenario = NurseSchedulingData(**scheduler.load_yaml(filepath))
+    ctx = scheduler.create_context(scenario)
+    ctx.assumptions = {}
+    scheduler.build_model(ctx, Profiler(enabled=False))
+    # Only feasibility matters
+    ctx.model.ClearObjective()
+    keys = list(ctx.assumptions)
+    ctx.model.AddAssumptions([ctx.assumptions[key] for key in keys])
+    logging.info(f"Diagnosing with {len(keys)} assumption literals...")
+
+    solver = cp_model.CpSolver()
+    # Infeasibility cores are only supported with a single worker
+    solver.parameters.num_workers = 1
+    if timeout is not None:
+        solver.parameters.max_time_in_seconds = float(timeout)
+    status = solver.Solve(ctx.model)
+    logging.info(f"Status: {solver.StatusName(status)}")
+    if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        return []
+    if status == cp_model.UNKNOWN:
+        return None
+    if status != cp_model.INFEASIBLE:
+        raise ValueError(f"Unable to diagnose the scenario! Status: {solver.StatusName(status)}")
+
+    map_index_key = {ctx.assumptions[key].Index(): key for key in keys}
+    conflicts = []
+    for index in sorted(solver.SufficientAssumptionsForInfeasibility(), key=lambda index: map_index_key[index]):
+        preference_idx, d = map_index_key[index]
+        preference = ctx.preferences[preference_idx]
+        conflicts.append({
+            'preference_idx': preference_idx,
+            'type': preference.type,
+            'description': preference.description,
+            'date': str(ctx.dates.items[d]) if d is not None else None,
+        })
+    return conflicts
@@ -17,15 +17,32 @@ You should have received a copy of the GNU Affero General Public License
 along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 
+import itertools
+import json
+import re
+
+import numpy as np
 import pandas as pd
-from ortools.sat.python import cp_model
-from openpyxl import load_workbook
+from openpyxl import Workbook, load_workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.comments import Comment
 
 from .context import Context
 from . import utils, models, constants
 
+# The streaming XLSX writer converts Styler CSS with pandas internals, which
+# may change in any release, so it is only used with the pandas versions it
+# is tested on, and `df.to_excel` is used otherwise.
+STREAMING_EXCEL_PANDAS_VERSIONS = ((2, 0), (3, 0))  # [min, max)
+try:
+    from pandas.io.excel._openpyxl import OpenpyxlWriter
+    from pandas.io.formats.excel import CSSToExcelConverter
+    from pandas.io.formats.style import Styler
+except ImportError:
+    OpenpyxlWriter = CSSToExcelConverter = Styler = None
+
 
-def get_people_versus_date_dataframe(ctx: Context, solver: cp_model.CpSolver, prettify: bool = False):
+def get_people_versus_date_dataframe(ctx: Context, shifts: np.ndarray, offs: np.ndarray, score, status: str, prettify: bool = False):
     # Initialize dataframe with size including leading rows and columns
     n_leading_rows, n_leading_cols = 2, 1
     n_trailing_rows, n_trailing_cols = 2, 0
@@ -120,13 +137,13 @@ def get_people_versus_date_dataframe(ctx: Context, solver: cp_model.CpSolver, pr
                         'target_value': 1 if pref.weight > 0 else 0
                     })
 
-    # Set cell values based on solver results
-    for (d, p) in ctx.map_dp_s.keys():
+    # Set cell values based on the solution
+    for (d, p) in itertools.product(range(ctx.n_days), range(ctx.n_people)):
         col_idx = n_leading_cols + n_history_cols + d
         assert df.iloc[n_leading_rows+p, col_idx] == ""
         cell_value = ""
-        for s in ctx.map_dp_s[(d, p)]:
-            if solver.Value(ctx.shifts[(d, s, p)]) == 1:
+        for s in np.flatnonzero(ctx.shifts.mask[d, :, p]):
+            if shifts[d, s, p] == 1:
                 if cell_value != "":
                     cell_value += ", "
                 cell_value += ctx.shiftTypes.items[s].id
@@ -141,13 +158,13 @@ def get_people_versus_date_dataframe(ctx: Context, solver: cp_model.CpSolver, pr
                     pref = pref_data['pref']
                     ss = pref_data['ss']
                     target_value = pref_data['target_value']
-                    vars = [ctx.shifts[(d, s, p)] for s in ss] if constants.OFF_sid not in ss else [ctx.offs[(d, p)]]
+                    values = [shifts[d, s, p] for s in ss] if constants.OFF_sid not in ss else [offs[d, p]]
                     if constants.OFF_sid in ss:
                         cell_value += " [OFF]"
                     else:
                         assert len(pref.shiftType) == 1
                         cell_value += f" [{pref.shiftType[0]}]"
-                    if all((solver.Value(var) != target_value) for var in vars):
+                    if all((value != target_value) for value in values):
                         cell_value += " [X]"
                         # Track this cell for Excel notes - store the weight
                         excel_row = n_leading_rows + p + 1  # +1 for 1-based Excel indexing
@@ -159,16 +176,16 @@ def get_people_versus_date_dataframe(ctx: Context, solver: cp_model.CpSolver, pr
 
     # Fill objective value
     df.iloc[n_leading_rows + len(ctx.people.items), 0] = "Score"
-    df.iloc[n_leading_rows + len(ctx.people.items), n_leading_cols + n_history_cols] = solver.Value(ctx.objective) # or solver.ObjectiveValue()
+    df.iloc[n_leading_rows + len(ctx.people.items), n_leading_cols + n_history_cols] = score
     # Fill solver status
     df.iloc[n_leading_rows + len(ctx.people.items) + 1, 0] = "Status"
-    df.iloc[n_leading_rows + len(ctx.people.items) + 1, n_leading_cols + n_history_cols] = ctx.solver_status
+    df.iloc[n_leading_rows + len(ctx.people.items) + 1, n_leading_cols + n_history_cols] = status
 
     # Sanity check with offs variables
     if not prettify:
         for (d, p) in ctx.offs.keys():
             col_idx = n_leading_cols + n_history_cols + d
-            if solver.Value(ctx.offs[(d, p)]) == 1:
+            if offs[d, p] == 1:
                 assert df.iloc[n_leading_rows+p, col_idx] == ""
             else:
                 assert df.iloc[n_leading_rows+p, col_idx] != ""
@@ -219,145 +236,63 @@ def get_people_versus_date_dataframe(ctx: Context, solver: cp_model.CpSolver, pr
             df.iloc[1, col_idx] = f"{shift_group.id} Count"
             col_idx += 1
         
-        # Count OFF days for each person (rows)
-        for p in range(len(ctx.people.items)):
-            off_workday = 0
-            off_freeday = 0
-            off_total = 0
-            off_weekday = 0
-            off_weekend = 0
-            
-            for d in range(len(ctx.dates.items)):
-                if solver.Value(ctx.offs[(d, p)]) == 1:
-                    off_total += 1
-                    # Check if this date is a weekend
-                    date = ctx.dates.items[d]
-                    if date.weekday() >= 5:  # Saturday=5, Sunday=6
-                        off_weekend += 1
-                    else:
-                        off_weekday += 1
-                    
-                    # Check if this date belongs to workday or freeday groups
-                    if workday_group_id and freeday_group_id:
-                        if d in ctx.map_did_d[workday_group_id]:
-                            off_workday += 1
-                        if d in ctx.map_did_d[freeday_group_id]:
-                            off_freeday += 1
-            
-            # Fill the OFF count columns
-            col_idx = off_col_start
-            if workday_group_id and freeday_group_id:
-                df.iloc[n_leading_rows + p, col_idx] = off_workday
-                col_idx += 1
-                df.iloc[n_leading_rows + p, col_idx] = off_freeday
-                col_idx += 1
-                
-            df.iloc[n_leading_rows + p, col_idx] = off_total
-            df.iloc[n_leading_rows + p, col_idx + 1] = off_weekday
-            df.iloc[n_leading_rows + p, col_idx + 2] = off_weekend
-            
-            # Fill shift type count columns for this person
-            shift_col_idx = shift_type_col_start
-            
-            # Count individual shift types for this person
-            for s in range(ctx.n_shift_types):
-                shift_count = sum(1 for d in range(len(ctx.dates.items))
-                                if solver.Value(ctx.shifts[(d, s, p)]) == 1)
-                df.iloc[n_leading_rows + p, shift_col_idx] = shift_count
-                shift_col_idx += 1
-            
-            # Count shift type groups for this person
-            for shift_group in ctx.shiftTypes.groups:
-                shift_group_count = sum(1 for d in range(len(ctx.dates.items))
-                                      if any(solver.Value(ctx.shifts[(d, s, p)]) == 1
-                                           for member_id in shift_group.members
-                                           for s in ctx.map_sid_s[member_id]))
-                df.iloc[n_leading_rows + p, shift_col_idx] = shift_group_count
-                shift_col_idx += 1
-        
+        # Count OFF days, shift types and shift type groups from the solution tensors
+        is_off = offs == 1  # D×P
+        is_weekend = np.array([date.weekday() >= 5 for date in ctx.dates.items], dtype=bool)  # Saturday=5, Sunday=6
+        off_counts = []
+        if workday_group_id and freeday_group_id:
+            for group_id in (workday_group_id, freeday_group_id):
+                in_group = np.zeros(ctx.n_days, dtype=bool)
+                in_group[ctx.map_did_d[group_id]] = True
+                off_counts.append(is_off[in_group].sum(axis=0))
+        off_counts += [is_off.sum(axis=0), is_off[~is_weekend].sum(axis=0), is_off[is_weekend].sum(axis=0)]
+        is_assigned = shifts == 1  # D×S×P
+        # Group membership as a G×S mask of shift type indices
+        group_masks = np.zeros((len(ctx.shiftTypes.groups), ctx.n_shift_types), dtype=bool)
+        for g, shift_group in enumerate(ctx.shiftTypes.groups):
+            for member_id in shift_group.members:
+                group_masks[g, ctx.map_sid_s[member_id]] = True
+        is_group_assigned = (is_assigned[:, None, :, :] & group_masks[None, :, :, None]).any(axis=2)  # D×G×P
+        shift_counts = np.concatenate([is_assigned, is_group_assigned], axis=1)  # D×(S+G)×P
+
+        # Fill the OFF and shift type count columns of each person (rows)
+        person_counts = np.concatenate([np.stack(off_counts), shift_counts.sum(axis=0)])  # C×P
+        people_rows = slice(n_leading_rows, n_leading_rows + ctx.n_people)
+        df.iloc[people_rows, off_col_start:off_col_start + len(person_counts)] = person_counts.T.astype(object)
+
         # Add shift type count rows for each date (columns)
         # First add an empty row
         empty_row_index = n_leading_rows + len(ctx.people.items) + n_trailing_rows
-        
-        # Add one row for each individual shift type
-        for s in range(ctx.n_shift_types):
-            shift_row_index = empty_row_index + 1 + s
-            df.iloc[shift_row_index, 0] = f"{ctx.shiftTypes.items[s].id} Count"
-            
-            for d in range(len(ctx.dates.items)):
-                shift_count = sum(1 for p in range(len(ctx.people.items))
-                                  if solver.Value(ctx.shifts[(d, s, p)]) == 1)
-                df.iloc[shift_row_index, n_leading_cols + n_history_cols + d] = shift_count
-        
-        # Add one row for each shift type group
-        for g, shift_group in enumerate(ctx.shiftTypes.groups):
-            shift_row_index = empty_row_index + 1 + ctx.n_shift_types + g
-            df.iloc[shift_row_index, 0] = f"{shift_group.id} Count"
-            
-            for d in range(len(ctx.dates.items)):
-                shift_count = sum(1 for p in range(len(ctx.people.items))
-                                  if any(solver.Value(ctx.shifts[(d, s, p)]) == 1
-                                  for member_id in shift_group.members
-                                  for s in ctx.map_sid_s[member_id]))
-                df.iloc[shift_row_index, n_leading_cols + n_history_cols + d] = shift_count
+        count_ids = [shift_type.id for shift_type in ctx.shiftTypes.items] + [shift_group.id for shift_group in ctx.shiftTypes.groups]
+        count_rows = slice(empty_row_index + 1, empty_row_index + 1 + len(count_ids))
+        date_col_start = n_leading_cols + n_history_cols
+        df.iloc[count_rows, 0] = [f"{count_id} Count" for count_id in count_ids]
+        df.iloc[count_rows, date_col_start:date_col_start + ctx.n_days] = shift_counts.sum(axis=2).T.astype(object)
 
     # Apply weekend highlighting and borders if prettify is enabled
     if prettify:
         # Create a styler object to apply conditional formatting
         def apply_styling(df):
-            # Create a style DataFrame with the same shape as the original
-            style_df = pd.DataFrame('', index=df.index, columns=df.columns)
-            
-            # Apply center alignment to all cells
-            for row_idx in range(len(df)):
-                for col_idx in range(len(df.columns)):
-                    style_df.iloc[row_idx, col_idx] = 'text-align: center'
-            
+            # The style of each cell is assembled from whole-array masks of the regions it belongs to,
+            # where each matching rule appends its style to the center alignment of all cells
+            n_rows, n_cols = df.shape
+            rows, cols = np.arange(n_rows), np.arange(n_cols)
+            date_col_begin = n_leading_cols + n_history_cols
+            date_cols = (date_col_begin <= cols) & (cols < date_col_begin + len(ctx.dates.items))
+            weekdays = df.iloc[1].to_numpy()
+
             # Apply dark red font color to cells containing violation markers "[X]"
-            for row_idx in range(len(df)):
-                for col_idx in range(len(df.columns)):
-                    cell_value = df.iloc[row_idx, col_idx]
-                    if cell_value and isinstance(cell_value, str) and "[X]" in cell_value:
-                        existing_style = style_df.iloc[row_idx, col_idx]
-                        if existing_style:
-                            style_df.iloc[row_idx, col_idx] = f"{existing_style}; color: #C00000"
-                        else:
-                            style_df.iloc[row_idx, col_idx] = "color: #C00000"
+            has_violation = np.char.find(df.to_numpy().astype(str), "[X]") >= 0
             
             # Apply light yellow background to history columns
-            for col_idx in range(n_leading_cols, n_leading_cols + n_history_cols):
-                for row_idx in range(len(df)):
-                    existing_style = style_df.iloc[row_idx, col_idx]
-                    if existing_style:
-                        style_df.iloc[row_idx, col_idx] = f"{existing_style}; background-color: #fefce8"
-                    else:
-                        style_df.iloc[row_idx, col_idx] = 'background-color: #fefce8'
+            history_cols = (n_leading_cols <= cols) & (cols < date_col_begin)
             
-            # Check each column to see if it represents a weekend or freeday group (only date columns, not history columns)
-            for col_idx in range(n_leading_cols + n_history_cols, n_leading_cols + n_history_cols + len(ctx.dates.items)):
-                d = col_idx - n_leading_cols - n_history_cols  # Get the date index
-                
-                # Get the weekday from row 1 (second row)
-                weekday = df.iloc[1, col_idx]
-                
-                # Check if this date belongs to the freeday group (highest priority)
-                if freeday_group_id and d in ctx.map_did_d[freeday_group_id]:
-                    # Apply light green background for freeday group
-                    for row_idx in range(len(df)):
-                        existing_style = style_df.iloc[row_idx, col_idx]
-                        if existing_style:
-                            style_df.iloc[row_idx, col_idx] = f"{existing_style}; background-color: #dcfce7"
-                        else:
-                            style_df.iloc[row_idx, col_idx] = 'background-color: #dcfce7'
-                # If it's Saturday or Sunday, highlight the entire column (lower priority than freeday)
-                elif weekday in ['Sat', 'Sun']:
-                    # Apply background color to all rows in this column
-                    for row_idx in range(len(df)):
-                        existing_style = style_df.iloc[row_idx, col_idx]
-                        if existing_style:
-                            style_df.iloc[row_idx, col_idx] = f"{existing_style}; background-color: #dbeafe"
-                        else:
-                            style_df.iloc[row_idx, col_idx] = 'background-color: #dbeafe'
+            # Apply light green background to the freeday group date columns (highest priority),
+            # and light blue background to Saturday and Sunday date columns (lower priority than freeday)
+            freeday_cols = np.zeros(n_cols, dtype=bool)
+            if freeday_group_id:
+                freeday_cols[[date_col_begin + d for d in ctx.map_did_d[freeday_group_id]]] = True
+            weekend_cols = date_cols & ~freeday_cols & np.isin(weekdays, ['Sat', 'Sun'])
             
             # Add borders to separate regions
             # Horizontal borders
@@ -382,35 +317,21 @@ def get_people_versus_date_dataframe(ctx: Context, solver: cp_model.CpSolver, pr
             # Calculate shift type column positions
             shift_type_individual_counts_col_end = off_weekend_col_end + ctx.n_shift_types
             shift_type_group_counts_col_end = shift_type_individual_counts_col_end + len(ctx.shiftTypes.groups)
-            
-            # Apply borders to all cells, then add specific border styles
-            for row_idx in range(len(df)):
-                for col_idx in range(len(df.columns)):
-                    base_style = style_df.iloc[row_idx, col_idx]
-                    borders = []
-                    
-                    # Add horizontal borders
-                    if row_idx in [header_row_end, people_row_end, summary_row_end, shift_type_individual_counts_row_end, shift_type_group_counts_row_end]:
-                        borders.append('border-bottom: 2px solid #374151')
-                    
-                    # Add vertical borders
-                    if col_idx in [name_col_end, history_col_end, date_col_end, off_total_col_end, off_weekend_col_end, shift_type_individual_counts_col_end, shift_type_group_counts_col_end]:
-                        borders.append('border-right: 2px solid #374151')
-                    
-                    # Add vertical border after Saturday columns (between Saturday and Sunday)
-                    if (n_leading_cols + n_history_cols <= col_idx < n_leading_cols + n_history_cols + len(ctx.dates.items) and
-                        df.iloc[1, col_idx] == 'Sat'):
-                        borders.append('border-right: 2px solid #9ca3af')
-                    
-                    # Combine base style with borders
-                    if borders:
-                        border_style = '; '.join(borders)
-                        if base_style:
-                            style_df.iloc[row_idx, col_idx] = f"{base_style}; {border_style}"
-                        else:
-                            style_df.iloc[row_idx, col_idx] = border_style
-            
-            return style_df
+
+            border_rows = np.isin(rows, [header_row_end, people_row_end, summary_row_end, shift_type_individual_counts_row_end, shift_type_group_counts_row_end])
+            border_cols = np.isin(cols, [name_col_end, history_col_end, date_col_end, off_total_col_end, off_weekend_col_end, shift_type_individual_counts_col_end, shift_type_group_counts_col_end])
+            # Add vertical border after Saturday columns (between Saturday and Sunday)
+            saturday_cols = date_cols & (weekdays == 'Sat')
+
+            # Combine the styles in order, broadcasting the row and column styles
+            styles = np.full((n_rows, n_cols), 'text-align: center', dtype=object)
+            styles = styles + np.where(has_violation, '; color: #C00000', '')
+            styles = styles + np.where(history_cols, '; background-color: #fefce8', '')[None, :]
+            styles = styles + np.where(freeday_cols, '; background-color: #dcfce7', np.where(weekend_cols, '; background-color: #dbeafe', ''))[None, :]
+            styles = styles + np.where(border_rows, '; border-bottom: 2px solid #374151', '')[:, None]
+            styles = styles + np.where(border_cols, '; border-right: 2px solid #374151', '')[None, :]
+            styles = styles + np.where(saturday_cols, '; border-right: 2px solid #9ca3af', '')[None, :]
+            return pd.DataFrame(styles, index=df.index, columns=df.columns)
         
         # Apply the styling and return the styled DataFrame
         styled_df = df.style.apply(lambda x: apply_styling(df), axis=None)
@@ -419,37 +340,82 @@ def get_people_versus_date_dataframe(ctx: Context, solver: cp_model.CpSolver, pr
     return df, cell_export_info
 
 
+def _supports_streaming_excel() -> bool:
+    pandas_version = tuple(map(int, re.match(r'(\d+)\.(\d+)', pd.__version__).groups()))
+    min_version, max_version = STREAMING_EXCEL_PANDAS_VERSIONS
+    return (
+        min_version <= pandas_version < max_version
+        and hasattr(OpenpyxlWriter, '_convert_to_style_kwargs')
+        and hasattr(Styler, '_compute')
+    )
+
+def _note_text(weights) -> str:
+    # Calculate total weight and create note text
+    total_weight = sum(weights)
+    if len(weights) == 1:
+        return f"Weight of unmet single-style request: {total_weight}"
+    return f"Weights of unmet single-style requests: {total_weight} (individual weights: {', '.join(map(str, weights))})"
+
 def export_to_excel(df, output_path, cell_export_info=None):
     """
     Export DataFrame to Excel with frozen panes at B3 (first two rows and first column).
     Also adds notes/comments to cells with [X] markers showing the weight of unmet single-style requests.
+    The workbook is written in a single pass in write-only mode, with the cell styles of a Styler
+    converted the same way as `Styler.to_excel`. With untested pandas versions, the workbook
+    is written with `to_excel` and formatted after reloading it instead.
     """
+    if not _supports_streaming_excel():
+        _export_to_excel_reloaded(df, output_path, cell_export_info)
+        return
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet()
+    ws.title = "Sheet1"
+    # Freeze the first two rows and first column (B3 is the cell after frozen area)
+    ws.freeze_panes = 'B3'
+
+    css_styles = {}
+    if isinstance(df, Styler):
+        df._compute()  # Calculate applied styles
+        css_styles = df.ctx
+        df = df.data
+    style_converter = CSSToExcelConverter()
+    style_cache = {}
+    for r, values in enumerate(df.itertuples(index=False, name=None)):
+        row_cells = []
+        for c, value in enumerate(values):
+            xcell = WriteOnlyCell(ws, value.item() if isinstance(value, np.generic) else value)
+            declarations = css_styles.get((r, c))
+            if declarations:
+                key = frozenset({prop.lower(): val for prop, val in declarations}.items())
+                if key not in style_cache:
+                    style_cache[key] = OpenpyxlWriter._convert_to_style_kwargs(style_converter(key))
+                for k, v in style_cache[key].items():
+                    setattr(xcell, k, v)
+            # Add notes/comments to cells with [X] markers if cell_export_info is provided
+            if cell_export_info and (r + 1, c + 1) in cell_export_info:
+                xcell.comment = Comment(_note_text(cell_export_info[(r + 1, c + 1)]), "Nurse Scheduling System")
+            row_cells.append(xcell)
+        ws.append(row_cells)
+
+    wb.save(output_path)
+
+def _export_to_excel_reloaded(df, output_path, cell_export_info=None):
     # Save DataFrame to Excel
     df.to_excel(output_path, index=False, header=False)
-    
+
     # Load the workbook to apply additional formatting
     wb = load_workbook(output_path)
     ws = wb.active
-    
+
     # Freeze the first two rows and first column (B3 is the cell after frozen area)
     ws.freeze_panes = 'B3'
-    
+
     # Add notes/comments to cells with [X] markers if cell_export_info is provided
     if cell_export_info:
-        from openpyxl.comments import Comment
         for (row, col), weights in cell_export_info.items():
-            cell = ws.cell(row=row, column=col)
-            # Calculate total weight and create note text
-            total_weight = sum(weights)
-            if len(weights) == 1:
-                note_text = f"Weight of unmet single-style request: {total_weight}"
-            else:
-                note_text = f"Weights of unmet single-style requests: {total_weight} (individual weights: {', '.join(map(str, weights))})"
-            
-            # Create and add the comment
-            comment = Comment(note_text, "Nurse Scheduling System")
-            cell.comment = comment
-    
+            ws.cell(row=row, column=col).comment = Comment(_note_text(weights), "Nurse Scheduling System")
+
     # Save the formatted workbook
     wb.save(output_path)
 
@@ -459,3 +425,16 @@ def export_to_csv(df, output_path):
     Export DataFrame to CSV with UTF-8 BOM for Excel compatibility.
     """
     df.to_csv(output_path, index=False, header=False, encoding='utf-8-sig')
+
+def export_variables(ctx: Context, values: np.ndarray, f, solution_idx: int = 0):
+    """
+    Write the values of all named variables to the file object `f` as JSON Lines,
+    with one `{"solution", "name", "index", "value"}` record per variable.
+    `values` holds the value of each variable in the model, ordered by proto index.
+    """
+    for array in (ctx.shifts, ctx.offs):
+        for key, index in zip(np.argwhere(array.mask), array.index[array.mask]):
+            f.write(json.dumps({'solution': solution_idx, 'name': array.name_format.format(*key), 'index': int(index), 'value': int(values[index])}) + '\n')
+    for name, var in ctx.model_vars.items():
+        index = var.Index()
+        f.write(json.dumps({'solution': solution_idx, 'name': name, 'index': index, 'value': int(values[index])}) + '\n')
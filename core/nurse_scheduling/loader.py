@@ -17,14 +17,19 @@ You should have received a copy of the GNU Affero General Public License
 along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 
+import logging
 import os
+import re
+import pandas as pd
 from ruamel.yaml import YAML
 from typing import Dict, Any
+from .constants import OFF
+from .context import Context
 from .models import NurseSchedulingData
 
 yaml = YAML(typ='safe')
 
-def _load_yaml(filepath: str) -> Dict[str, Any]:
+def load_yaml(filepath: str) -> Dict[str, Any]:
     if not os.path.isfile(filepath):
         raise FileNotFoundError(f"File {filepath} should exist")
     with open(filepath, "r", encoding="utf-8") as r:
@@ -42,5 +47,57 @@ def load_data(filepath: str) -> NurseSchedulingData:
     Returns:
         NurseSchedulingData: The validated scheduling data
     """
-    data = _load_yaml(filepath)
+    data = load_yaml(filepath)
     return NurseSchedulingData(**data)
+
+def load_solution(filepath: str, ctx: Context) -> Dict[tuple[int, int, int], int]:
+    """Load the shift assignments of a previously exported CSV/XLSX roster.
+
+    People are matched by ID, and date columns are matched by position, so
+    that a roster of a previous period can also be used (e.g., as a solution hint).
+    Prettify markers such as ` [OFF]` and ` [X]` are ignored.
+
+    Args:
+        filepath: Path to the exported roster
+        ctx: The context of the scenario to map the roster onto
+
+    Returns:
+        Dict mapping (d, s, p) to 0 or 1, for all people and dates found in the roster
+    """
+    if not os.path.isfile(filepath):
+        raise FileNotFoundError(f"File {filepath} should exist")
+    if os.path.splitext(filepath)[1].lower() == '.xlsx':
+        df = pd.read_excel(filepath, header=None, dtype=str, keep_default_na=False)
+    else:
+        df = pd.read_csv(filepath, header=None, dtype=str, keep_default_na=False, encoding='utf-8-sig')
+    if len(df) < 2:
+        raise ValueError(f"Roster {filepath} must have at least two header rows")
+    # Date columns start after the name (and history) columns, and end at
+    # the first empty header (followed by the prettify summary columns).
+    date_cols = []
+    for col in range(1, len(df.columns)):
+        header = df.iloc[1, col]
+        if header == "History":
+            continue
+        if header == "":
+            break
+        date_cols.append(col)
+    map_pid_p = {str(person.id): p for p, person in enumerate(ctx.people.items)}
+    map_sid_s = {str(shift_type.id): s for s, shift_type in enumerate(ctx.shiftTypes.items)}
+    solution = {}
+    for row in range(2, len(df)):
+        pid = df.iloc[row, 0]
+        if pid not in map_pid_p:
+            continue
+        p = map_pid_p[pid]
+        for d, col in enumerate(date_cols[:ctx.n_days]):
+            # Remove prettify markers (e.g., ` [OFF]`, ` [X]`) and split the assigned shift types
+            cell = re.sub(r'\s*\[[^\]]*\]', '', df.iloc[row, col]).strip()
+            sids = [sid.strip() for sid in cell.split(',')] if cell and cell != OFF else []
+            if any(sid not in map_sid_s for sid in sids):
+                logging.warning(f"Ignoring unknown shift type in roster {filepath}: '{cell}' (person {pid})")
+                continue
+            ss = {map_sid_s[sid] for sid in sids}
+            for s in range(ctx.n_shift_types):
+                solution[(d, s, p)] = int(s in ss)
+    return solution
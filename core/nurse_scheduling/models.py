@@ -25,6 +25,7 @@ from typing import Any, Dict, List, Tuple
 from pydantic import BaseModel, Field, ConfigDict, model_validator, field_validator
 from typing_extensions import Annotated, Self
 from .constants import ALL, OFF, MAP_WEEKDAY_TO_STR, MAP_DATE_KEYWORD_TO_FILTER
+from . import solver_profiles
 
 AT_MOST_ONE_SHIFT_PER_DAY = 'at most one shift per day'
 SHIFT_TYPE_REQUIREMENT = 'shift type requirement'
@@ -33,6 +34,10 @@ SHIFT_TYPE_SUCCESSIONS = 'shift type successions'
 SHIFT_COUNT = 'shift count'
 SHIFT_AFFINITY = 'shift affinity'
 
+# Encodings of shift type successions
+PRODUCT_ENCODING = 'product'  # One match variable per combination of shift types in the pattern
+WINDOW_ENCODING = 'window'  # One match variable per window of days
+
 def validate_weight(weight: int | float) -> int | float:
     """Validate that float weights can only be positive or negative infinity."""
     if isinstance(weight, float):
@@ -117,6 +122,7 @@ class ShiftTypeSuccessionsPreference(BasePreference):
     pattern: List[str | List[str]]  # List of shift type IDs or nested patterns
     date: (int | str | datetime.date) | List[int | str | datetime.date] | None = None  # Single date or list of dates
     weight: (int | float) = Field(default=1)  # For float can only be .inf or -.inf
+    encoding: Annotated[str, Field(pattern=f"^({PRODUCT_ENCODING}|{WINDOW_ENCODING})$")] = PRODUCT_ENCODING
     
     @field_validator('weight')
     @classmethod
@@ -175,6 +181,16 @@ class ShiftAffinityPreference(BasePreference):
     def validate_weight_field(cls, v):
         return validate_weight(v)
 
+class SolverConfig(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+    profile: str | None = None  # Solver profile name, see `solver_profiles.SOLVER_PROFILES`
+    parameters: Dict[str, bool | int | float | str] = Field(default_factory=dict)  # Raw CP-SAT parameter overrides
+
+    @model_validator(mode='after')
+    def validate_parameters(self) -> Self:
+        solver_profiles.create_parameters(self.profile, self.parameters)
+        return self
+
 class NurseSchedulingData(BaseModel):
     model_config = ConfigDict(extra="forbid")
     appVersion: str | None = None
@@ -192,6 +208,7 @@ class NurseSchedulingData(BaseModel):
         ShiftCountPreference |
         ShiftAffinityPreference
     ]
+    solver: SolverConfig | None = None
 
     @model_validator(mode='after')
     def validate_model(self) -> Self:
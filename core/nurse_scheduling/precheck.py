@@ -0,0 +1,187 @@
+"""
+This file is part of Nurse Scheduling Project, see <https://github.com/j3soon/nurse-scheduling>.
+
+Copyright (C) 2023-2025 Johnson Sun
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as
+published by the Free Software Foundation, either version 3 of the
+License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+# Cheap necessary conditions for feasibility, checked before building the model.
+# Each check only relies on hard constraints, so a scenario that fails any of
+# them is infeasible. Passing all checks does not imply feasibility.
+
+import math
+from typing import Dict, List, Set, Tuple
+
+import numpy as np
+
+from . import models, utils
+from .constants import ALL, OFF_sid
+from .context import Context
+
+def _requirement_bounds(ctx: Context):
+    # For each shift (d, s), the bounds on the number of assigned people and the people that may be assigned
+    lo: Dict[Tuple[int, int], int] = {}
+    hi: Dict[Tuple[int, int], int] = {}
+    qualified: Dict[Tuple[int, int], Set[int]] = {}
+    for preference in ctx.preferences:
+        if preference.type != models.SHIFT_TYPE_REQUIREMENT:
+            continue
+        try:
+            ds = range(ctx.n_days)
+            if preference.date is not None:
+                ds = utils.parse_dates(preference.date, ctx.map_did_d, ctx.dates.range)
+            ss = [s for s in utils.parse_sids(preference.shiftType, ctx.map_sid_s) if s != OFF_sid]
+            ps = set(range(ctx.n_people))
+            if preference.qualifiedPeople is not None:
+                ps = set(utils.parse_pids(preference.qualifiedPeople, ctx.map_pid_p))
+        except ValueError:
+            # Invalid preferences are reported when building the model
+            continue
+        for d in ds:
+            for s in ss:
+                lo[(d, s)] = max(lo.get((d, s), 0), preference.requiredNumPeople)
+                n_max = preference.preferredNumPeople if preference.preferredNumPeople is not None else preference.requiredNumPeople
+                hi[(d, s)] = min(hi.get((d, s), math.inf), n_max)
+                qualified[(d, s)] = qualified.get((d, s), ps) & ps
+    return lo, hi, qualified
+
+def _request_bounds(ctx: Context):
+    # For each (d, p), the shift types that must (not) be worked, according to the requests with infinite weights
+    must: Dict[Tuple[int, int], Set[int]] = {}
+    must_not: Dict[Tuple[int, int], Set[int]] = {}
+    for preference in ctx.preferences:
+        if preference.type != models.SHIFT_REQUEST or preference.weight not in (math.inf, -math.inf):
+            continue
+        try:
+            ds = utils.parse_dates(preference.date, ctx.map_did_d, ctx.dates.range)
+            ss = utils.parse_sids(preference.shiftType, ctx.map_sid_s)
+            ps = utils.parse_pids(preference.person, ctx.map_pid_p)
+        except ValueError:
+            continue
+        # Working any shift type is represented as `ALL`, and being off as `OFF_sid`
+        if utils.is_ss_equivalent_to_all(ss, ctx.n_shift_types):
+            ss = [ALL]
+        for d in ds:
+            for p in ps:
+                for s in ss:
+                    if preference.weight == math.inf:
+                        must.setdefault((d, p), set()).add(s)
+                    elif s == ALL:
+                        must.setdefault((d, p), set()).add(OFF_sid)
+                    elif s == OFF_sid:
+                        must.setdefault((d, p), set()).add(ALL)
+                    else:
+                        must_not.setdefault((d, p), set()).add(s)
+    return must, must_not
+
+def check_feasibility(ctx: Context) -> List[str]:
+    """Returns the reasons why the scenario is trivially infeasible, if any.
+
+    The checks only consider the hard constraints of shift type requirements,
+    at most one shift per day, and shift requests with infinite weights.
+    """
+    problems = []
+    date = lambda d: str(ctx.dates.items[d])
+    sid = lambda s: ctx.shiftTypes.items[s].id
+    pid = lambda p: ctx.people.items[p].id
+    lo, hi, qualified = _requirement_bounds(ctx)
+    must, must_not = _request_bounds(ctx)
+
+    # Contradicting shift requests
+    is_off = {}
+    for (d, p), ss in sorted(must.items()):
+        ss_not = must_not.get((d, p), set())
+        shift_ss = sorted(s for s in ss if s not in (ALL, OFF_sid))
+        if OFF_sid in ss and (ALL in ss or shift_ss):
+            problems.append(f"Person {pid(p)} is required to be both off and working on {date(d)}")
+        elif len(shift_ss) > 1:
+            problems.append(f"Person {pid(p)} is required to work multiple shift types {[sid(s) for s in shift_ss]} on {date(d)}")
+        elif set(shift_ss) & ss_not:
+            problems.append(f"Person {pid(p)} is required to both work and not work shift type {sid(shift_ss[0])} on {date(d)}")
+        elif ALL in ss and len(ss_not) == ctx.n_shift_types:
+            problems.append(f"Person {pid(p)} is required to work on {date(d)}, but all shift types are excluded")
+        is_off[(d, p)] = OFF_sid in ss
+
+    # Shift type requirements
+    for (d, s) in sorted(lo):
+        if lo[(d, s)] > hi[(d, s)]:
+            problems.append(f"Shift type {sid(s)} on {date(d)} requires at least {lo[(d, s)]} and at most {hi[(d, s)]} people")
+            continue
+        if len(qualified[(d, s)]) < lo[(d, s)]:
+            problems.append(f"Shift type {sid(s)} on {date(d)} requires {lo[(d, s)]} people, but only {len(qualified[(d, s)])} people are qualified")
+            continue
+        # People that are required to work this shift, or may work it
+        forced_ps = [p for p in range(ctx.n_people) if s in must.get((d, p), ())]
+        for p in forced_ps:
+            if p not in qualified[(d, s)]:
+                problems.append(f"Person {pid(p)} is required to work shift type {sid(s)} on {date(d)}, but is not qualified")
+        if len(forced_ps) > hi[(d, s)]:
+            problems.append(f"Shift type {sid(s)} on {date(d)} allows at most {hi[(d, s)]} people, but {len(forced_ps)} people are required to work it")
+        available_ps = [
+            p for p in qualified[(d, s)]
+            if not is_off.get((d, p)) and s not in must_not.get((d, p), ())
+            and not any(s2 != s and s2 not in (ALL, OFF_sid) for s2 in must.get((d, p), ()))
+        ]
+        if len(available_ps) < lo[(d, s)]:
+            problems.append(f"Shift type {sid(s)} on {date(d)} requires {lo[(d, s)]} people, but only {len(available_ps)} qualified people are available")
+
+    # At most one shift per day
+    for d in range(ctx.n_days):
+        ss = [s for s in range(ctx.n_shift_types) if lo.get((d, s), 0) > 0]
+        n_required = sum(lo[(d, s)] for s in ss)
+        n_qualified = len(set().union(*(qualified[(d, s)] for s in ss)))
+        if n_required > n_qualified:
+            problems.append(f"Shift types {[sid(s) for s in ss]} on {date(d)} require {n_required} people in total, but only {n_qualified} people are qualified for any of them")
+    return problems
+
+def find_fixed_assignments(ctx: Context) -> Tuple[np.ndarray, np.ndarray]:
+    """Returns the values of the shift and off variables that are fixed by the hard constraints.
+
+    The returned D×S×P and D×P arrays are 0 or 1 for the fixed variables and
+    -1 for the free ones. Assignments are fixed to 0 for unqualified people,
+    and fixed by shift requests with infinite weights. Conflicting assignments
+    are left free, so that the infeasibility is reported as usual.
+    """
+    _, _, qualified = _requirement_bounds(ctx)
+    must, must_not = _request_bounds(ctx)
+    fixed_to_0 = np.zeros((ctx.n_days, ctx.n_shift_types, ctx.n_people), dtype=bool)
+    fixed_to_1 = np.zeros_like(fixed_to_0)
+    for (d, s), ps in qualified.items():
+        unqualified_mask = np.ones(ctx.n_people, dtype=bool)
+        unqualified_mask[list(ps)] = False
+        fixed_to_0[d, s, unqualified_mask] = True
+    off_to_0 = np.zeros((ctx.n_days, ctx.n_people), dtype=bool)
+    for (d, p), ss in must.items():
+        for s in ss:
+            if s == OFF_sid:
+                fixed_to_0[d, :, p] = True
+            elif s == ALL:
+                off_to_0[d, p] = True
+            else:
+                fixed_to_1[d, s, p] = True
+    for (d, p), ss in must_not.items():
+        for s in ss:
+            fixed_to_0[d, s, p] = True
+    conflict = fixed_to_0 & fixed_to_1
+    shifts = np.full(fixed_to_0.shape, -1, dtype=np.int8)
+    shifts[fixed_to_0 & ~conflict] = 0
+    shifts[fixed_to_1 & ~conflict] = 1
+    # A person is off if and only if no shift is worked
+    all_0 = (shifts == 0).all(axis=1)
+    any_1 = (shifts == 1).any(axis=1) | off_to_0
+    offs = np.full(all_0.shape, -1, dtype=np.int8)
+    offs[all_0 & ~any_1] = 1
+    offs[any_1 & ~all_0] = 0
+    return shifts, offs
@@ -19,9 +19,12 @@ along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
 import itertools
 import math
+
+import numpy as np
+
 from . import utils
 from .context import Context
-from .report import Report
+from .report import SKIP_IF_EQUAL, SKIP_IF_NOT_EQUAL
 from . import models
 from . import constants
 
@@ -46,44 +49,47 @@ def shift_type_requirements(ctx: Context, preference: models.ShiftTypeRequiremen
     for d in ds:
         for s in ss:
             # Get the set of people who can work this shift
-            qualified_ps = ctx.map_ds_p[(d, s)]
+            qualified_ps = np.flatnonzero(ctx.shifts.mask[d, s])
             if preference.qualifiedPeople is not None:
                 # If qualified_people is specified, only allow those people to work the shift
                 qualified_ps = utils.parse_pids(preference.qualifiedPeople, ctx.map_pid_p)
-                unqualified_n_people = sum(ctx.shifts[(d, s, p)] for p in range(ctx.n_people) if p not in qualified_ps)
-                ctx.model.Add(unqualified_n_people == 0)
+                unqualified_n_people = utils.count_assigned(ctx, [d], [p for p in range(ctx.n_people) if p not in qualified_ps], [s])
+                utils.add_hard_constraint(ctx, ctx.model.Add(unqualified_n_people == 0), preference_idx, d)
             
             # Add constraint that exactly required_num_people must be assigned from the qualified people
-            actual_n_people = sum(ctx.shifts[(d, s, p)] for p in qualified_ps)
+            actual_n_people = utils.count_assigned(ctx, [d], qualified_ps, [s])
             if preference.preferredNumPeople is not None:
-                ctx.model.Add(actual_n_people >= preference.requiredNumPeople)
+                utils.add_hard_constraint(ctx, ctx.model.Add(actual_n_people >= preference.requiredNumPeople), preference_idx, d)
             else:
-                ctx.model.Add(actual_n_people == preference.requiredNumPeople)
+                utils.add_hard_constraint(ctx, ctx.model.Add(actual_n_people == preference.requiredNumPeople), preference_idx, d)
 
             # Add soft constraint for preferred number of people if specified
             if preference.preferredNumPeople is not None:
-                ctx.model.Add(actual_n_people <= preference.preferredNumPeople)
+                utils.add_hard_constraint(ctx, ctx.model.Add(actual_n_people <= preference.preferredNumPeople), preference_idx, d)
                 # Create a variable to track the difference between actual and preferred number of people
                 diff_var_name = f"pref_{preference_idx}_d_{d}_s_{s}_diff"
                 ctx.model_vars[diff_var_name] = diff = ctx.model.NewIntVar(0, preference.preferredNumPeople, diff_var_name)
-                ctx.model.Add(diff == preference.preferredNumPeople - actual_n_people)
+                # Also guarded, since the domain of `diff` bounds the number of people
+                utils.add_hard_constraint(ctx, ctx.model.Add(diff == preference.preferredNumPeople - actual_n_people), preference_idx, d)
                 
                 # Add the objective
                 weight = preference.weight
                 if weight in [math.inf, -math.inf]:
                     raise ValueError(f"Infinity weights are not allowed for {models.SHIFT_TYPE_REQUIREMENT} with 'preferredNumPeople'. Use 'requiredNumPeople' instead to enforce hard constraints.")
-                utils.add_objective(ctx, weight, diff)
-                ctx.reports.append(Report(f"shift_type_requirements_{diff_var_name}", diff, lambda x: x == 0))
+                utils.add_objective(ctx, weight, diff, preference_idx, d)
+                ctx.reports.append("shift_type_requirements_pref_{}_d_{}_s_{}_diff", preference_idx, (d, s), diff, SKIP_IF_EQUAL, 0)
 
 def all_people_work_at_most_one_shift_per_day(ctx: Context, preference, preference_idx):
     # Hard constraint
     # For all people, for all days, only work at most one shift.
     # Note that a shift in day `d` can be represented as `s` instead of (d, s).
     # i.e., sum_{s}(shifts[(d, s, p)]) <= 1, for all (d, p)
-    for (d, p), ss in ctx.map_dp_s.items():
-        actual_n_shifts = sum(ctx.shifts[(d, s, p)] for s in ss)
-        maximum_n_shifts = 1
-        ctx.model.Add(actual_n_shifts <= maximum_n_shifts)
+    for d in range(ctx.n_days):
+        for p in range(ctx.n_people):
+            ss = np.flatnonzero(ctx.shifts.mask[d, :, p])
+            actual_n_shifts = utils.count_assigned(ctx, [d], [p], ss)
+            maximum_n_shifts = 1
+            utils.add_hard_constraint(ctx, ctx.model.Add(actual_n_shifts <= maximum_n_shifts), preference_idx, d)
 
 def shift_request(ctx: Context, preference: models.ShiftRequestPreference, preference_idx):
     # Soft constraint
@@ -99,17 +105,17 @@ def shift_request(ctx: Context, preference: models.ShiftRequestPreference, prefe
             weight = preference.weight
             if utils.is_ss_equivalent_to_all(ss, ctx.n_shift_types):
                 # Add the objective
-                utils.add_objective(ctx, weight, ctx.offs[(d, p)].Not())
-                ctx.reports.append(Report(f"shift_request_pref_{preference_idx}_d_{d}_p_{p}_offs", ctx.offs[(d, p)], lambda x: x == 0))
+                utils.add_objective(ctx, weight, utils.works(ctx, d, p), preference_idx, d)
+                ctx.reports.append("shift_request_pref_{}_d_{}_p_{}_offs", preference_idx, (d, p), ctx.offs[(d, p)], SKIP_IF_EQUAL, 0)
             else:
                 for s in ss:
                     # Add the objective
                     if s == constants.OFF_sid:
-                        utils.add_objective(ctx, weight, ctx.offs[(d, p)])
-                        ctx.reports.append(Report(f"shift_request_pref_{preference_idx}_d_{d}_p_{p}_offs", ctx.offs[(d, p)], lambda x: x == 1))
+                        utils.add_objective(ctx, weight, utils.any_assigned(ctx, [d], [p], [s]), preference_idx, d)
+                        ctx.reports.append("shift_request_pref_{}_d_{}_p_{}_offs", preference_idx, (d, p), ctx.offs[(d, p)], SKIP_IF_EQUAL, 1)
                     else:
-                        utils.add_objective(ctx, weight, ctx.shifts[(d, s, p)])
-                        ctx.reports.append(Report(f"shift_request_pref_{preference_idx}_d_{d}_s_{s}_p_{p}_shifts", ctx.shifts[(d, s, p)], lambda x: x == 1))
+                        utils.add_objective(ctx, weight, utils.any_assigned(ctx, [d], [p], [s]), preference_idx, d)
+                        ctx.reports.append("shift_request_pref_{}_d_{}_s_{}_p_{}_shifts", preference_idx, (d, s, p), ctx.shifts[(d, s, p)], SKIP_IF_EQUAL, 1)
 
 def shift_type_successions(ctx: Context, preference: models.ShiftTypeSuccessionsPreference, preference_idx):
     # Soft constraint
@@ -136,47 +142,73 @@ def shift_type_successions(ctx: Context, preference: models.ShiftTypeSuccessions
             parsed_pattern.append(flattened_pattern[i])
     assert len(parsed_pattern) == len(flattened_pattern)
 
+    pattern_len = len(flattened_pattern)
     ds = range(ctx.n_days)
     # Parse date range if specified
     if preference.date is not None:
         ds = utils.parse_dates(preference.date, ctx.map_did_d, ctx.dates.range)
+    # Mark the start dates whose pattern range only includes valid dates
+    date_mask = np.zeros(ctx.n_days, dtype=bool)
+    date_mask[list(ds)] = True
+    n_valid = np.concatenate(([0], np.cumsum(date_mask)))
+    n_windows = max(ctx.n_days - pattern_len + 1, 0)
+    d_begins = np.flatnonzero(n_valid[pattern_len:pattern_len+n_windows] - n_valid[:n_windows] == pattern_len)
 
     for p in ps:
-        for d_begin in range(ctx.n_days - len(flattened_pattern) + 1):
-            # Check if all dates in the pattern range are valid
-            if not all(d in ds for d in range(d_begin, d_begin + len(flattened_pattern))):
-                continue
+        # Consider history data to check for patterns that start at day 0
+        # We only need to check day 0 since any pattern that matches history must include it
+        history_patterns = []
+        if len(d_begins) > 0 and d_begins[0] == 0 and ctx.people.items[p].history is not None:
+            history = [utils.parse_sids(sid, ctx.map_sid_s) for sid in ctx.people.items[p].history]
+            for i in range(len(history)):
+                if len(history[i]) != 1 and ctx.people.items[p].history[i] != constants.OFF:
+                    raise ValueError(f"History must not include nested ID, but got {ctx.people.items[p].history[i]}")
+                if ctx.people.items[p].history[i] == constants.ALL:
+                    raise ValueError(f"History must not include 'ALL', but got {ctx.people.items[p].history[i]}")
+                else:
+                    history[i] = history[i][0]
+            # For each pattern, check if its prefix matches the end of shift history
+            # If so, add the remaining suffix as a new pattern to check
+            for history_suffix_len in range(1, min(pattern_len, len(history)) + 1):
+                history_suffix = history[-history_suffix_len:]
+                pattern_prefix = flattened_pattern[:history_suffix_len]
+                if all(history_suffix[i] in pattern_prefix[i] for i in range(history_suffix_len)):
+                    # If history suffix matches pattern prefix, add remaining pattern suffix as new pattern
+                    # This is equivalent to checking patterns that span across history and future days
+                    history_patterns.append(parsed_pattern[history_suffix_len:])
+        for d_begin in map(int, d_begins):
             # Match all patterns that start at day d_begin
             patterns = [parsed_pattern]
-            # Consider history data to check for patterns that start at day 0
-            # We only need to check day 0 since any pattern that matches history must include it
-            if d_begin == 0 and ctx.people.items[p].history is not None:
-                history = [utils.parse_sids(sid, ctx.map_sid_s) for sid in ctx.people.items[p].history]
-                for i in range(len(history)):
-                    if len(history[i]) != 1 and ctx.people.items[p].history[i] != constants.OFF:
-                        raise ValueError(f"History must not include nested ID, but got {ctx.people.items[p].history[i]}")
-                    if ctx.people.items[p].history[i] == constants.ALL:
-                        raise ValueError(f"History must not include 'ALL', but got {ctx.people.items[p].history[i]}")
-                    else:
-                        history[i] = history[i][0]
-                # For each pattern, check if its prefix matches the end of shift history
-                # If so, add the remaining suffix as a new pattern to check
-                for history_suffix_len in range(1, min(len(flattened_pattern), len(history)) + 1):
-                    history_suffix = history[-history_suffix_len:]
-                    pattern_prefix = flattened_pattern[:history_suffix_len]
-                    if all(history_suffix[i] in pattern_prefix[i] for i in range(history_suffix_len)):
-                        # If history suffix matches pattern prefix, add remaining pattern suffix as new pattern
-                        # This is equivalent to checking patterns that span across history and future days
-                        patterns.append(parsed_pattern[history_suffix_len:])
+            if d_begin == 0:
+                patterns += history_patterns
             for pattern in patterns:
+                target_n_matched = len(pattern)
+                if preference.encoding == models.WINDOW_ENCODING:
+                    # Since at most one shift is worked per day, at most one combination of the
+                    # product encoding can match, so a single match variable per window is equivalent.
+                    # i.e., is_match = AND_{i}(element literal of pattern[i] on day d_begin+i)
+                    unique_var_prefix = f"shift_type_successions_pref_{preference_idx}_p_{p}_dbegin_{d_begin}_len_{len(pattern)}"
+                    is_match_var_name = f"{unique_var_prefix}_is_match"
+                    in_element = [
+                        utils.works(ctx, d_begin+i, p) if pattern[i] == constants.ALL else utils.any_assigned(ctx, [d_begin+i], [p], pattern[i])
+                        for i in range(len(pattern))
+                    ]
+                    ctx.model_vars[is_match_var_name] = is_match = ctx.model.NewBoolVar(is_match_var_name)
+                    ctx.model.AddBoolAnd(in_element).OnlyEnforceIf(is_match)
+                    ctx.model.AddBoolOr([lit.Not() for lit in in_element]).OnlyEnforceIf(is_match.Not())
+
+                    # Add the objective
+                    weight = preference.weight
+                    utils.add_objective(ctx, weight, is_match, preference_idx, d_begin)
+                    ctx.reports.append("shift_type_successions_pref_{}_p_{}_dbegin_{}_len_{}", preference_idx, (p, d_begin, len(pattern)), is_match, SKIP_IF_NOT_EQUAL, target_n_matched)
+                    continue
                 # For each day and pattern, collect all matched shifts
                 match_shifts_in_day = []
                 for i in range(len(pattern)):
                     if pattern[i] == constants.ALL:
-                        match_shifts_in_day.append([ctx.offs[(d_begin+i, p)].Not()])
+                        match_shifts_in_day.append([utils.works(ctx, d_begin+i, p)])
                     else:
-                        match_shifts_in_day.append([ctx.shifts[(d_begin+i, s, p)] if s != constants.OFF_sid else ctx.offs[(d_begin+i, p)] for s in pattern[i]])
-                target_n_matched = len(pattern)
+                        match_shifts_in_day.append([utils.any_assigned(ctx, [d_begin+i], [p], [s]) for s in pattern[i]])
                 for idx, seq in enumerate(itertools.product(*match_shifts_in_day)):
                     assert len(seq) == len(pattern)
                     # Construct: is_match = (actual_n_matched == target_n_matched)
@@ -191,8 +223,54 @@ def shift_type_successions(ctx: Context, preference: models.ShiftTypeSuccessions
 
                     # Add the objective
                     weight = preference.weight
-                    utils.add_objective(ctx, weight, is_match)
-                    ctx.reports.append(Report(unique_var_prefix, is_match, lambda x: x != target_n_matched))
+                    utils.add_objective(ctx, weight, is_match, preference_idx, d_begin)
+                    ctx.reports.append("shift_type_successions_pref_{}_p_{}_dbegin_{}_seq_{}", preference_idx, (p, d_begin, idx), is_match, SKIP_IF_NOT_EQUAL, target_n_matched)
+
+def get_total_shifts(ctx: Context):
+    # Calculate total preferred shifts across all shift type requirements
+    total_shifts = 0
+    for pref in ctx.preferences:
+        if pref.type == models.SHIFT_TYPE_REQUIREMENT:
+            shift_types = utils.parse_sids(pref.shiftType, ctx.map_sid_s)
+            total_shifts += (pref.preferredNumPeople or pref.requiredNumPeople) * len(shift_types) * ctx.n_days
+    return total_shifts
+
+def get_shift_count_target(ctx: Context, target, total_shifts):
+    # Resolve a shift count target (int or special constant name) to an int
+    if isinstance(target, int):
+        T = target
+        if T < 0:
+            raise ValueError(f"Target must be non-negative, but got {T}")
+    elif target == 'floor(AVG_SHIFTS_PER_PERSON)':
+        T = math.floor(total_shifts / ctx.n_people)
+    elif target == 'ceil(AVG_SHIFTS_PER_PERSON)':
+        T = math.ceil(total_shifts / ctx.n_people)
+    elif target == 'round(AVG_SHIFTS_PER_PERSON)':
+        # Keep in mind the rounding behavior of Python
+        # Ref: https://stackoverflow.com/q/10825926
+        T = round(total_shifts / ctx.n_people)
+    else:
+        raise ValueError(f"Unsupported target: {target}")
+    assert isinstance(T, int)
+    return T
+
+# Couples all people of the preference, instead of applying to each person separately
+MINIMAX_EXPRESSION = 'max(|x - T|)'
+SUPPORTED_EXPRESSIONS = ['|x - T|^2', '|x - T|^2 (linearized)', '|x - T|', MINIMAX_EXPRESSION, 'x >= T', 'x <= T', 'x > T', 'x < T', 'x = T']
+
+def _check_penalty_weight(weight, expression):
+    if weight == math.inf:
+        raise ValueError(f"'.inf' weights are not allowed for shift count with '{expression}'.")
+    elif weight != -math.inf and weight > 0:
+        # -inf means x == T, which is okay
+        raise ValueError(f"Weight must be non-positive for shift count with '{expression}'.")
+
+def _add_abs_deviation(ctx: Context, unique_var_prefix, x, T, MAX_DEV):
+    # Returns a variable of |x - T|
+    diff_var_name = f"{unique_var_prefix}_diff"
+    ctx.model_vars[diff_var_name] = diff = ctx.model.NewIntVar(0, MAX_DEV, diff_var_name)
+    ctx.model.AddAbsEquality(diff, x - T)
+    return diff
 
 def shift_count(ctx: Context, preference: models.ShiftCountPreference, preference_idx):
     # Soft constraint
@@ -203,12 +281,7 @@ def shift_count(ctx: Context, preference: models.ShiftCountPreference, preferenc
     c_ds = utils.parse_dates(preference.countDates, ctx.map_did_d, ctx.dates.range)
     c_ss = utils.parse_sids(preference.countShiftTypes, ctx.map_sid_s)
 
-    # Calculate total preferred shifts across all shift type requirements
-    total_shifts = 0
-    for pref in ctx.preferences:
-        if pref.type == models.SHIFT_TYPE_REQUIREMENT:
-            shift_types = utils.parse_sids(pref.shiftType, ctx.map_sid_s)
-            total_shifts += (pref.preferredNumPeople or pref.requiredNumPeople) * len(shift_types) * ctx.n_days
+    total_shifts = get_total_shifts(ctx)
 
     expressions = utils.ensure_list(preference.expression)
     targets = utils.ensure_list(preference.target)
@@ -219,55 +292,68 @@ def shift_count(ctx: Context, preference: models.ShiftCountPreference, preferenc
     weight = preference.weight
     for i in range(len(expressions)):
         expression, target = expressions[i], targets[i]
-        if isinstance(target, int):
-            T = target
-            if T < 0:
-                raise ValueError(f"Target must be non-negative, but got {T}")
-        elif target == 'floor(AVG_SHIFTS_PER_PERSON)':
-            T = math.floor(total_shifts / ctx.n_people)
-        elif target == 'ceil(AVG_SHIFTS_PER_PERSON)':
-            T = math.ceil(total_shifts / ctx.n_people)
-        elif target == 'round(AVG_SHIFTS_PER_PERSON)':
-            # Keep in mind the rounding behavior of Python
-            # Ref: https://stackoverflow.com/q/10825926
-            T = round(total_shifts / ctx.n_people)
-        else:
-            raise ValueError(f"Unsupported target: {target}")
-        assert isinstance(T, int)
+        T = get_shift_count_target(ctx, target, total_shifts)
+        # Since a person works at most one shift per day (and is off otherwise),
+        # the actual number of shifts is in [0, len(c_ds)], which bounds the deviation from target
+        MAX_DEV = max(len(c_ds) - T, T)
+
+        if expression == MINIMAX_EXPRESSION:
+            # i.e., min(weight * max_{p}(|actual_n_shifts - T|)), for all p,
+            # which penalizes the largest deviation in the group (minimax fairness)
+            _check_penalty_weight(weight, expression)
+            if len(ps) == 0:
+                continue
+            diffs = [_add_abs_deviation(ctx, f"pref_{preference_idx}_expr_{i}_p_{p}", utils.count_assigned(ctx, c_ds, [p], c_ss), T, MAX_DEV) for p in ps]
+            max_diff_var_name = f"pref_{preference_idx}_expr_{i}_max_diff"
+            ctx.model_vars[max_diff_var_name] = max_diff = ctx.model.NewIntVar(0, MAX_DEV, max_diff_var_name)
+            ctx.model.AddMaxEquality(max_diff, diffs)
+            utils.add_objective(ctx, weight, max_diff, preference_idx)
+            ctx.reports.append("shift_count_pref_{}_expr_{}_max_diff", preference_idx, (i,), max_diff, SKIP_IF_EQUAL, 0)
+            continue
 
         for p in ps:
-            unique_var_prefix = f"pref_{preference_idx}_p_{p}"
+            # The expression index keeps the names of multiple expressions apart
+            unique_var_prefix = f"pref_{preference_idx}_expr_{i}_p_{p}"
             # Calculate actual number of shifts for this person
-            if utils.is_ss_equivalent_to_all(c_ss, ctx.n_shift_types):
-                x = sum(ctx.shifts[(d, s, p)] for d in c_ds for s in c_ss)
-            else:
-                x = sum(ctx.shifts[(d, s, p)] if s != constants.OFF_sid else ctx.offs[(d, p)] for d in c_ds for s in c_ss)
+            # The count is shared across expressions, targets, and preferences
+            x = utils.count_assigned(ctx, c_ds, [p], c_ss)
 
             # TODO: Also Report value of `x`
             
-            SUPPORTED_EXPRESSIONS = ['|x - T|^2', 'x >= T', 'x <= T', 'x > T', 'x < T', 'x = T']
             # Evaluate the expression
             if expression == '|x - T|^2':
                 # Note that a shift is represented as (d, s)
                 # i.e., min(weight * (actual_n_shifts - T) ** 2), for all p,
                 # where actual_n_shifts = sum_{(d, s)}(shifts[(d, s, p)])
                 # Create a variable to represent the deviation from target
-                MAX = max(total_shifts - T, T)
-                diff_var_name = f"{unique_var_prefix}_diff"
-                ctx.model_vars[diff_var_name] = diff = ctx.model.NewIntVar(0, MAX, diff_var_name) # Min is 0, since diff is assigned through AddAbsEquality
-                ctx.model.AddAbsEquality(diff, x - T)
+                diff = _add_abs_deviation(ctx, unique_var_prefix, x, T, MAX_DEV)
                 # Square the difference
                 squared_var_name = f"{unique_var_prefix}_squared"
-                ctx.model_vars[squared_var_name] = squared = ctx.model.NewIntVar(0, MAX**2, squared_var_name)
+                ctx.model_vars[squared_var_name] = squared = ctx.model.NewIntVar(0, MAX_DEV**2, squared_var_name)
                 ctx.model.AddMultiplicationEquality(squared, diff, diff)
                 # Add the objective
-                if weight == math.inf:
-                    raise ValueError(f"'.inf' weights are not allowed for shift count with '{expression}'.")
-                elif weight != -math.inf and weight > 0:
-                    # -inf means x == T, which is okay
-                    raise ValueError(f"Weight must be non-positive for shift count with '{expression}'.")
-                utils.add_objective(ctx, weight, squared)
-                ctx.reports.append(Report(f"shift_count_{squared_var_name}", squared, lambda x: x == 0))
+                _check_penalty_weight(weight, expression)
+                utils.add_objective(ctx, weight, squared, preference_idx)
+                ctx.reports.append("shift_count_pref_{}_p_{}_squared", preference_idx, (p,), squared, SKIP_IF_EQUAL, 0)
+            elif expression == '|x - T|^2 (linearized)':
+                # Same as '|x - T|^2', but the square is encoded by its chords between consecutive integers,
+                # i.e., squared >= (2k+1) * diff - k(k+1), for all 0 <= k < MAX_DEV,
+                # which is exact for integer deviations since the objective minimizes `squared`.
+                # This avoids the multiplication constraint, which is slow to propagate.
+                _check_penalty_weight(weight, expression)
+                diff = _add_abs_deviation(ctx, unique_var_prefix, x, T, MAX_DEV)
+                squared_var_name = f"{unique_var_prefix}_squared"
+                ctx.model_vars[squared_var_name] = squared = ctx.model.NewIntVar(0, MAX_DEV**2, squared_var_name)
+                for k in range(MAX_DEV):
+                    ctx.model.Add(squared >= (2*k+1) * diff - k*(k+1))
+                utils.add_objective(ctx, weight, squared, preference_idx)
+                ctx.reports.append("shift_count_pref_{}_p_{}_squared", preference_idx, (p,), squared, SKIP_IF_EQUAL, 0)
+            elif expression == '|x - T|':
+                # i.e., min(weight * |actual_n_shifts - T|), for all p
+                _check_penalty_weight(weight, expression)
+                diff = _add_abs_deviation(ctx, unique_var_prefix, x, T, MAX_DEV)
+                utils.add_objective(ctx, weight, diff, preference_idx)
+                ctx.reports.append("shift_count_pref_{}_p_{}_diff", preference_idx, (p,), diff, SKIP_IF_EQUAL, 0)
             elif expression in SUPPORTED_EXPRESSIONS:
                 expr_var_name = f"{unique_var_prefix}_expr"
                 # str -> (expr, expr.Not())
@@ -284,9 +370,9 @@ def shift_count(ctx: Context, preference: models.ShiftCountPreference, preferenc
                     equations[0],
                     equations[1]
                 )
-                utils.add_objective(ctx, weight, expr)
+                utils.add_objective(ctx, weight, expr, preference_idx)
                 # TODO: Be aware of signs of `weight`?
-                ctx.reports.append(Report(f"shift_count_{unique_var_prefix}_expr", expr, lambda x: x))
+                ctx.reports.append("shift_count_pref_{}_p_{}_expr", preference_idx, (p,), expr, SKIP_IF_NOT_EQUAL, 0)
             else:
                 raise ValueError(f"Unsupported expression: {expression}. Supported expressions are: {SUPPORTED_EXPRESSIONS}")
 
@@ -351,30 +437,16 @@ def shift_affinity(ctx: Context, preference: models.ShiftAffinityPreference, pre
             for j, p2s in enumerate(flattened_people2):
                 for k, ss in enumerate(flattened_shift_types):
                     unique_var_prefix = f"pref_{preference_idx}_d_{d}_i_{i}_j_{j}_k_{k}"
-                    some_p1_matched_var_name = f"{unique_var_prefix}_some_p1_matched"
-                    some_p2_matched_var_name = f"{unique_var_prefix}_some_p2_matched"
                     is_match_var_name = f"{unique_var_prefix}_is_match"
-                    sum1 = sum(ctx.shifts[(d, s, p)] if s != constants.OFF_sid else ctx.offs[(d, p)] for p in p1s for s in ss)
-                    ctx.model_vars[some_p1_matched_var_name] = some_p1_matched = utils.ortools_expression_to_bool_var(
-                        ctx.model, some_p1_matched_var_name,
-                        sum1 != 0,
-                        sum1 == 0
-                    )
-                    sum2 = sum(ctx.shifts[(d, s, p)] if s != constants.OFF_sid else ctx.offs[(d, p)] for p in p2s for s in ss)
-                    ctx.model_vars[some_p2_matched_var_name] = some_p2_matched = utils.ortools_expression_to_bool_var(
-                        ctx.model, some_p2_matched_var_name,
-                        sum2 != 0,
-                        sum2 == 0
-                    )
-                    sum3 = some_p1_matched + some_p2_matched
-                    ctx.model_vars[is_match_var_name] = is_match = utils.ortools_expression_to_bool_var(
-                        ctx.model, is_match_var_name,
-                        sum3 == 2,
-                        sum3 != 2
-                    )
+                    # The "some member works" literals are shared across (i, j, k) and preferences
+                    some_p1_matched = utils.any_assigned(ctx, [d], p1s, ss)
+                    some_p2_matched = utils.any_assigned(ctx, [d], p2s, ss)
+                    ctx.model_vars[is_match_var_name] = is_match = ctx.model.NewBoolVar(is_match_var_name)
+                    ctx.model.AddBoolAnd([some_p1_matched, some_p2_matched]).OnlyEnforceIf(is_match)
+                    ctx.model.AddBoolOr([some_p1_matched.Not(), some_p2_matched.Not()]).OnlyEnforceIf(is_match.Not())
                     weight = preference.weight
-                    utils.add_objective(ctx, weight, is_match)
-                    ctx.reports.append(Report(f"shift_affinity_{unique_var_prefix}_is_match", is_match, lambda x: x == 1))
+                    utils.add_objective(ctx, weight, is_match, preference_idx, d)
+                    ctx.reports.append("shift_affinity_pref_{}_d_{}_i_{}_j_{}_k_{}_is_match", preference_idx, (d, i, j, k), is_match, SKIP_IF_EQUAL, 1)
 
 PREFERENCE_TYPES_TO_FUNC = {
     models.SHIFT_TYPE_REQUIREMENT: shift_type_requirements,
@@ -0,0 +1,104 @@
+"""
+This file is part of Nurse Scheduling Project, see <https://github.com/j3soon/nurse-scheduling>.
+
+Copyright (C) 2023-2025 Johnson Sun
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as
+published by the Free Software Foundation, either version 3 of the
+License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import contextlib
+import json
+import sys
+import time
+import tracemalloc
+from typing import Any, Dict, List
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+from ortools.sat.python import cp_model
+
+def _max_rss_bytes() -> int | None:
+    if resource is None:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes on Linux
+    return max_rss if sys.platform == 'darwin' else max_rss * 1024
+
+class Profiler:
+    """Records the wall time, peak memory, and model growth of each phase.
+
+    Pass an instance to `schedule(..., profiler=...)` and inspect `records`
+    (or write them with `to_json`) afterwards. If `trace_memory` is set,
+    peak memory is measured with `tracemalloc`, which only covers
+    allocations made through Python, and slows down the profiled code
+    considerably, so the wall times are then no longer representative.
+    Since the CP-SAT model proto is allocated natively, the process-wide
+    maximum resident set size is also recorded after each phase.
+
+    A disabled profiler records nothing and adds no overhead.
+    """
+
+    def __init__(self, enabled: bool = True, trace_memory: bool = False):
+        self.enabled = enabled
+        self.trace_memory = trace_memory
+        self.records: List[Dict[str, Any]] = []
+
+    @contextlib.contextmanager
+    def phase(self, name: str, model: cp_model.CpModel | None = None, **info):
+        """Profiles the enclosed block as a phase named `name`.
+
+        If `model` is given, the number of variables and constraints added
+        to it during the phase are also recorded. Additional keyword
+        arguments (e.g., the preference index) are stored as-is, and the
+        yielded record can be updated within the block.
+        """
+        if not self.enabled:
+            yield {}
+            return
+        record = {'phase': name, **info}
+        started_tracing = self.trace_memory and not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+        n_variables = len(model.proto.variables) if model is not None else None
+        n_constraints = len(model.proto.constraints) if model is not None else None
+        start_time = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record['wall_time'] = time.perf_counter() - start_time
+            record['peak_memory_bytes'] = tracemalloc.get_traced_memory()[1] if self.trace_memory else None
+            if started_tracing:
+                tracemalloc.stop()
+            record['max_rss_bytes'] = _max_rss_bytes()
+            if model is not None:
+                record['variables_added'] = len(model.proto.variables) - n_variables
+                record['constraints_added'] = len(model.proto.constraints) - n_constraints
+            self.records.append(record)
+
+    def report(self) -> Dict[str, Any]:
+        """Returns the recorded phases and their total wall time."""
+        return {
+            'total_wall_time': sum(record['wall_time'] for record in self.records),
+            'phases': self.records,
+        }
+
+    def to_json(self, output_path: str):
+        """Writes the report to `output_path` as JSON."""
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump(self.report(), f, indent=2)
@@ -17,11 +17,104 @@ You should have received a copy of the GNU Affero General Public License
 along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 
-from dataclasses import dataclass
-from typing import Any, Callable
-
-@dataclass
-class Report:
-    description: str
-    variable: Any
-    skip_condition: Callable[[Any], bool] = lambda x: False # Skip the report if the condition is true (success)
+from array import array
+from typing import Dict, List
+
+import numpy as np
+
+# Conditions of the reports, where a report is skipped (success) if the
+# value of its variable compared with the operand meets the condition
+SKIP_IF_EQUAL = 0
+SKIP_IF_NOT_EQUAL = 1
+
+# Maximum length of the index tuple of a report, e.g., (d, i, j, k) of shift affinity
+MAX_INDEX_LEN = 4
+
+class ReportTable:
+    """A columnar table of the reports of all preferences.
+
+    Each row stores a preference index, a kind, a small index tuple, the proto
+    index of the reported variable, and a skip condition with its operand.
+    The kind is a description format string (e.g., "shift_request_pref_{}_d_{}_p_{}_offs")
+    that is only formatted with the preference index and index tuple when needed.
+    """
+
+    def __init__(self):
+        self.kinds: List[str] = []
+        self._map_kind_code: Dict[str, int] = {}
+        self._preference_idx = array('q')
+        self._kind = array('q')
+        self._index = array('q')  # MAX_INDEX_LEN entries per row, padded with -1
+        self._index_len = array('q')
+        self._variable = array('q')
+        self._condition = array('q')
+        self._operand = array('q')
+
+    def __len__(self) -> int:
+        return len(self._kind)
+
+    # The array columns, as stored by `to_arrays`
+    COLUMNS = ('preference_idx', 'kind', 'index', 'index_len', 'variable', 'condition', 'operand')
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        """Returns the kinds and columns as NumPy arrays, e.g., to be saved with `np.savez`."""
+        arrays = {column: self._column(getattr(self, f"_{column}")) for column in self.COLUMNS}
+        arrays['kinds'] = np.array(self.kinds, dtype=str)
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays) -> "ReportTable":
+        """Restores a table from the arrays of `to_arrays`."""
+        table = cls()
+        for kind in arrays['kinds'].tolist():
+            table._map_kind_code[kind] = len(table.kinds)
+            table.kinds.append(kind)
+        for column in cls.COLUMNS:
+            getattr(table, f"_{column}").extend(arrays[column].tolist())
+        return table
+
+    def append(self, kind: str, preference_idx: int, index: tuple, variable, condition: int, operand: int):
+        if kind not in self._map_kind_code:
+            self._map_kind_code[kind] = len(self.kinds)
+            self.kinds.append(kind)
+        assert len(index) <= MAX_INDEX_LEN
+        self._preference_idx.append(preference_idx)
+        self._kind.append(self._map_kind_code[kind])
+        self._index.extend(index)
+        self._index.extend([-1] * (MAX_INDEX_LEN - len(index)))
+        self._index_len.append(len(index))
+        self._variable.append(variable.Index())
+        self._condition.append(condition)
+        self._operand.append(operand)
+
+    def _column(self, column: array) -> np.ndarray:
+        return np.array(column, dtype=np.int64)
+
+    def index(self, i: int) -> tuple:
+        return tuple(self._index[i * MAX_INDEX_LEN:i * MAX_INDEX_LEN + self._index_len[i]])
+
+    def description(self, i: int) -> str:
+        return self.kinds[self._kind[i]].format(self._preference_idx[i], *self.index(i))
+
+    def evaluate(self, values: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Returns the reported values and the mask of reports that are not skipped.
+
+        `values` holds the value of each variable in the model, ordered by proto index.
+        """
+        reported = np.asarray(values)[self._column(self._variable)]
+        equal = reported == self._column(self._operand)
+        skipped = np.where(self._column(self._condition) == SKIP_IF_EQUAL, equal, ~equal)
+        return reported, ~skipped
+
+    def violations(self, values: np.ndarray) -> List[dict]:
+        """Returns the reports that are not skipped, given the values of all variables."""
+        reported, mask = self.evaluate(values)
+        return [
+            {
+                'preference_idx': self._preference_idx[i],
+                'description': self.description(i),
+                'index': self.index(i),
+                'value': int(reported[i]),
+            }
+            for i in map(int, np.flatnonzero(mask))
+        ]
@@ -0,0 +1,96 @@
+"""
+This file is part of Nurse Scheduling Project, see <https://github.com/j3soon/nurse-scheduling>.
+
+Copyright (C) 2023-2025 Johnson Sun
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as
+published by the Free Software Foundation, either version 3 of the
+License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import functools
+
+import numpy as np
+
+from . import exporter
+from .context import Context
+
+class ScheduleResult:
+    """The result of a single solve.
+
+    The values of all variables are read from the solver response in one
+    bulk read, and the shift assignments are kept as a D×S×P array
+    (`shifts[d, s, p]`) and a D×P array (`offs[d, p]`) of 0/1 values. The
+    people versus date DataFrame (optionally prettified), `cell_export_info`,
+    the `(d, s, p)`-keyed `solution` dict, and the report `violations` are
+    computed on first access.
+
+    For compatibility, the result can be unpacked or indexed as the
+    `(df, solution, score, status, cell_export_info)` tuple. If no solution
+    is found, all fields except `status` are None.
+    """
+
+    FIELDS = ('df', 'solution', 'score', 'status', 'cell_export_info')
+
+    def __init__(self, ctx: Context, status: str, values: np.ndarray | None = None, score: int | None = None,
+                 prettify: bool = False, parameters: dict | None = None, hint_agreement: float | None = None):
+        self.ctx = ctx
+        self.status = status
+        self.values = values
+        """The value of each variable in the model, ordered by proto index."""
+        self.score = score
+        self.prettify = prettify
+        self.parameters = parameters
+        """The CP-SAT parameters of the solve."""
+        self.hint_agreement = hint_agreement
+        """The fraction of hinted shift assignments kept in the solution, if a hint is given."""
+        self.shifts = values[ctx.shifts.index].astype(np.int8) if values is not None else None
+        self.offs = values[ctx.offs.index].astype(np.int8) if values is not None else None
+
+    @functools.cached_property
+    def _dataframe(self):
+        if self.values is None:
+            return None, None
+        return exporter.get_people_versus_date_dataframe(self.ctx, self.shifts, self.offs, self.score, self.status, prettify=self.prettify)
+
+    @property
+    def df(self):
+        return self._dataframe[0]
+
+    @property
+    def cell_export_info(self):
+        return self._dataframe[1]
+
+    @functools.cached_property
+    def solution(self) -> dict | None:
+        if self.values is None:
+            return None
+        keys = np.argwhere(self.ctx.shifts.mask)
+        return dict(zip(map(tuple, keys.tolist()), self.shifts[self.ctx.shifts.mask].tolist()))
+
+    @functools.cached_property
+    def violations(self) -> list[dict] | None:
+        """The reports that are not satisfied (see `report.ReportTable.violations`)."""
+        if self.values is None:
+            return None
+        return self.ctx.reports.violations(self.values)
+
+    def __iter__(self):
+        return (getattr(self, field) for field in self.FIELDS)
+
+    def __len__(self) -> int:
+        return len(self.FIELDS)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return tuple(getattr(self, field) for field in self.FIELDS[i])
+        return getattr(self, self.FIELDS[i])
@@ -0,0 +1,197 @@
+"""
+This file is part of Nurse Scheduling Project, see <https://github.com/j3soon/nurse-scheduling>.
+
+Copyright (C) 2023-2025 Johnson Sun
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as
+published by the Free Software Foundation, either version 3 of the
+License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+# Rolling-horizon decomposition for long planning periods.
+# The planning period is solved as a sequence of overlapping windows, where
+# the first days of each window are committed before moving on to the next.
+
+import logging
+from typing import Dict, List, Tuple
+
+from . import models, preference_types, scheduler, utils
+from .constants import OFF, OFF_sid
+from .context import Context
+from .models import NurseSchedulingData
+from .result import ScheduleResult
+
+def _resolve_dates(ctx: Context, dates, w_begin: int, w_end: int) -> List[str]:
+    # Resolve dates against the full planning period, and keep the ones within the window
+    return [str(ctx.dates.items[d]) for d in utils.parse_dates(dates, ctx.map_did_d, ctx.dates.range) if w_begin <= d < w_end]
+
+def _count_committed(ctx: Context, solution: Dict[Tuple[int, int, int], int], ds: List[int], ss: List[int], p: int) -> int:
+    # Count the shifts of person (p) on the committed days (ds) with the shift types (ss), following `shift_count`
+    n = 0
+    for d in ds:
+        n_shifts = sum(solution[(d, s, p)] for s in range(ctx.n_shift_types))
+        n += sum(n_shifts == 0 if s == OFF_sid else solution[(d, s, p)] for s in ss)
+    return n
+
+def _prorate(T: int, n_committed: float, n_window: int, n_remaining: int) -> int:
+    # Spread the remaining target evenly over the remaining count dates
+    return round(max(T - n_committed, 0) * n_window / n_remaining)
+
+def _window_preferences(ctx: Context, solution: Dict[Tuple[int, int, int], int], w_begin: int, w_end: int) -> list:
+    total_shifts = preference_types.get_total_shifts(ctx)
+    preferences = []
+    for preference in ctx.preferences:
+        if preference.type in (models.SHIFT_REQUEST, models.SHIFT_AFFINITY):
+            dates = _resolve_dates(ctx, preference.date, w_begin, w_end)
+            if dates:
+                preferences.append(preference.model_copy(update={'date': dates}))
+        elif preference.type in (models.SHIFT_TYPE_REQUIREMENT, models.SHIFT_TYPE_SUCCESSIONS):
+            if preference.date is None:
+                preferences.append(preference)
+                continue
+            dates = _resolve_dates(ctx, preference.date, w_begin, w_end)
+            if dates:
+                preferences.append(preference.model_copy(update={'date': dates}))
+        elif preference.type == models.SHIFT_COUNT:
+            # Prorate the remaining target of each person over the remaining count dates.
+            # Since the committed counts differ between people, the preference is split per person,
+            # except for `max(|x - T|)`, which couples all people of the preference.
+            c_ds = utils.parse_dates(preference.countDates, ctx.map_did_d, ctx.dates.range)
+            c_ss = utils.parse_sids(preference.countShiftTypes, ctx.map_sid_s)
+            committed_ds = [d for d in c_ds if d < w_begin]
+            n_remaining = sum(d >= w_begin for d in c_ds)
+            window_dates = [str(ctx.dates.items[d]) for d in c_ds if w_begin <= d < w_end]
+            if not window_dates:
+                continue
+            expressions = utils.ensure_list(preference.expression)
+            targets = [
+                preference_types.get_shift_count_target(ctx, target, total_shifts)
+                for target in utils.ensure_list(preference.target)
+            ]
+            if len(expressions) != len(targets):
+                raise ValueError(f"Number of expressions ({len(expressions)}) must match number of targets ({len(targets)})")
+            ps = utils.parse_pids(preference.person, ctx.map_pid_p)
+            n_committed = {p: _count_committed(ctx, solution, committed_ds, c_ss, p) for p in ps}
+            per_person = [(expression, T) for expression, T in zip(expressions, targets) if expression != preference_types.MINIMAX_EXPRESSION]
+            minimax = [(expression, T) for expression, T in zip(expressions, targets) if expression == preference_types.MINIMAX_EXPRESSION]
+            if per_person:
+                for p in ps:
+                    preferences.append(preference.model_copy(update={
+                        'person': ctx.people.items[p].id,
+                        'countDates': window_dates,
+                        'target': [_prorate(T, n_committed[p], len(window_dates), n_remaining) for _, T in per_person],
+                        'expression': [expression for expression, _ in per_person],
+                    }))
+            if minimax and ps:
+                # A single target is shared by all people, so the committed counts are approximated by their mean
+                mean_committed = sum(n_committed.values()) / len(ps)
+                preferences.append(preference.model_copy(update={
+                    'person': [ctx.people.items[p].id for p in ps],
+                    'countDates': window_dates,
+                    'target': [_prorate(T, mean_committed, len(window_dates), n_remaining) for _, T in minimax],
+                    'expression': [expression for expression, _ in minimax],
+                }))
+        else:
+            preferences.append(preference)
+    return preferences
+
+def _window_people(ctx: Context, solution: Dict[Tuple[int, int, int], int], w_begin: int) -> models.PeopleContainer:
+    # Carry the committed days into the history of each person
+    items = []
+    for p, person in enumerate(ctx.people.items):
+        history = list(person.history or [])
+        for d in range(w_begin):
+            ss = [s for s in range(ctx.n_shift_types) if solution[(d, s, p)]]
+            history.append(ctx.shiftTypes.items[ss[0]].id if ss else OFF)
+        items.append(person.model_copy(update={'history': history or None}))
+    return ctx.people.model_copy(update={'items': items})
+
+def _window_scenario(scenario: NurseSchedulingData, ctx: Context, solution: Dict[Tuple[int, int, int], int],
+                     w_begin: int, w_end: int) -> NurseSchedulingData:
+    # Date groups are dropped, since all dates are resolved against the full planning period
+    dates = models.DateContainer(range=models.DateRange(
+        startDate=ctx.dates.items[w_begin], endDate=ctx.dates.items[w_end - 1],
+    ))
+    return scenario.model_copy(update={
+        'dates': dates,
+        'people': _window_people(ctx, solution, w_begin),
+        'preferences': _window_preferences(ctx, solution, w_begin, w_end),
+    })
+
+def schedule_rolling(filepath: str | NurseSchedulingData, window_days: int, commit_days: int | None = None,
+                     deterministic=False, prettify=False, timeout: int | None = None, num_workers: int | None = None,
+                     solver_profile: str | None = None, solver_parameters: dict | None = None, symmetry_breaking: bool = False):
+    """Schedule a long planning period with a rolling horizon.
+
+    Windows of `window_days` days are solved in sequence, and the first
+    `commit_days` days (defaults to half of the window) of each window are
+    fixed before solving the next window, which starts right after them.
+    The committed days are passed to later windows through `Person.history`,
+    and the integer targets of each `shift count` preference are prorated,
+    i.e., the remaining target of each person is spread evenly over the
+    remaining count dates. `timeout` applies to each window.
+
+    The stitched schedule is finally evaluated against the model of the full
+    planning period, and returned in the same format as `schedule`. The
+    result is not guaranteed to be optimal for the full period, and may
+    violate hard constraints spanning multiple windows (e.g., a `shift count`
+    with infinite weight), in which case the status is INFEASIBLE. Otherwise,
+    the status is FEASIBLE unless the planning period fits in a single window.
+
+    `symmetry_breaking` applies to the solve of each window (see
+    `scheduler.schedule_top_k`), but not to the evaluation of the stitched
+    schedule.
+    """
+    if window_days < 1:
+        raise ValueError(f"window_days must be positive, but got {window_days}")
+    if commit_days is None:
+        commit_days = max(1, window_days // 2)
+    if not 1 <= commit_days <= window_days:
+        raise ValueError(f"commit_days must be between 1 and window_days ({window_days}), but got {commit_days}")
+    if isinstance(filepath, NurseSchedulingData):
+        scenario = filepath
+    else:
+        logging.info(f"Loading scenario from '{filepath}'...")
+        scenario = NurseSchedulingData(**scheduler.load_yaml(filepath))
+    ctx = scheduler.create_context(scenario)
+    solver_options = dict(
+        deterministic=deterministic, timeout=timeout, num_workers=num_workers,
+        solver_profile=solver_profile, solver_parameters=solver_parameters,
+    )
+    if window_days >= ctx.n_days:
+        return scheduler.schedule(scenario, prettify=prettify, symmetry_breaking=symmetry_breaking, **solver_options)
+
+    solution = {}
+    hint = None
+    w_begin = 0
+    while w_begin < ctx.n_days:
+        w_end = min(w_begin + window_days, ctx.n_days)
+        # Commit the whole window if it is the last one
+        c_end = min(w_begin + commit_days, ctx.n_days) if w_end < ctx.n_days else w_end
+        logging.info(f"Solving window {ctx.dates.items[w_begin]}~{ctx.dates.items[w_end - 1]}...")
+        window = _window_scenario(scenario, ctx, solution, w_begin, w_end)
+        df, window_solution, score, status, _ = scheduler.schedule(window, hint_solution=hint, symmetry_breaking=symmetry_breaking, **solver_options)
+        if window_solution is None:
+            logging.warning(f"No solution found for window {ctx.dates.items[w_begin]}~{ctx.dates.items[w_end - 1]}")
+            return ScheduleResult(ctx, status)
+        for (d, s, p), value in window_solution.items():
+            if w_begin + d < c_end:
+                solution[(w_begin + d, s, p)] = value
+        # Start the next window from the uncommitted days of this window
+        hint = {(w_begin + d - c_end, s, p): value for (d, s, p), value in window_solution.items() if w_begin + d >= c_end}
+        w_begin = c_end
+
+    logging.info("Evaluating the stitched schedule on the full planning period...")
+    result = scheduler.schedule(scenario, prettify=prettify, fixed_solution=solution, **solver_options)
+    if result.solution is None:
+        logging.warning("The stitched schedule violates hard constraints of the full planning period")
+    return result
@@ -17,32 +17,36 @@ You should have received a copy of the GNU Affero General Public License
 along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 
-import itertools
+import contextlib
 import logging
 import time
 from datetime import timedelta
 
+import numpy as np
 from ortools.sat.python import cp_model
 
-from . import exporter, preference_types
+from . import cache, exporter, precheck, preference_types, solver_profiles, symmetry
 from .context import Context
-from .utils import ortools_expression_to_bool_var, parse_dates, MAP_DATE_KEYWORD_TO_FILTER, MAP_WEEKDAY_TO_STR
+from .variables import BoolVarArray
+from .utils import count_assigned, parse_dates, MAP_DATE_KEYWORD_TO_FILTER, MAP_WEEKDAY_TO_STR
 from .constants import ALL, OFF, OFF_sid
-from .loader import load_data
+from .loader import load_solution, load_yaml
+from .models import NurseSchedulingData
+from .profiler import Profiler
+from .result import ScheduleResult
 
-def schedule(filepath: str, deterministic=False, avoid_solution=None, prettify=False, timeout: int | None = None):
-    logging.info(f"Loading scenario from '{filepath}'...")
-    scenario = load_data(filepath)
+MAX_LOGGED_PROBLEMS = 10
 
-    logging.info("Extracting scenario data...")
+def create_context(scenario: NurseSchedulingData) -> Context:
+    """Create the scheduling context with ID-to-index maps, but without any model variables."""
     if scenario.apiVersion != "alpha":
         raise NotImplementedError(f"Unsupported API version: {scenario.apiVersion}")
     ctx = Context(**dict(scenario))
-    del scenario
     ctx.n_days = (ctx.dates.range.endDate - ctx.dates.range.startDate).days + 1
     ctx.n_shift_types = len(ctx.shiftTypes.items)
     ctx.n_people = len(ctx.people.items)
-    ctx.dates.items = [ctx.dates.range.startDate + timedelta(days=d) for d in range(ctx.n_days)]
+    # Copy the container, so that the scenario itself is not modified
+    ctx.dates = ctx.dates.model_copy(update={'items': [ctx.dates.range.startDate + timedelta(days=d) for d in range(ctx.n_days)]})
 
     # Map shift type ID to shift type index
     for s in range(ctx.n_shift_types):
@@ -90,18 +94,144 @@ def schedule(filepath: str, deterministic=False, avoid_solution=None, prettify=F
                 date_indices.update(parse_dates(member, ctx.map_did_d, ctx.dates.range))
         ctx.map_did_d[group.id] = sorted(set(date_indices))
 
-    logging.info("Initializing solver model...")
+    return ctx
 
-    logging.info("Creating shift variables...")
-    # Ref: https://developers.google.com/optimization/scheduling/employee_scheduling
-    # In the following code, we always use the convention of (d, s, p)
-    # to represent the index of (day, shift_type, person).
-    # The object will not be abbreviated as (d, s, p) to avoid confusion.
-    for d in range(ctx.n_days):
-        for s in range(ctx.n_shift_types):
+def build_model(ctx: Context, profiler: Profiler):
+    """Create the model variables, preferences, and objective in `ctx.model`."""
+    with profiler.phase("create_variables", ctx.model):
+        logging.info("Creating shift variables...")
+        # Ref: https://developers.google.com/optimization/scheduling/employee_scheduling
+        # In the following code, we always use the convention of (d, s, p)
+        # to represent the index of (day, shift_type, person).
+        # The object will not be abbreviated as (d, s, p) to avoid confusion.
+        # Assignments fixed by the hard constraints are constants instead of variables.
+        # In diagnose mode, they are kept as variables so that the hard constraints can be relaxed.
+        fixed_shifts, fixed_offs = precheck.find_fixed_assignments(ctx) if ctx.assumptions is None else (None, None)
+        ctx.shifts = BoolVarArray(ctx.model, "shift_d{}_s{}_p{}", (ctx.n_days, ctx.n_shift_types, ctx.n_people), fixed_shifts)
+
+        logging.info("Creating off variables...")
+        ctx.offs = BoolVarArray(ctx.model, "off_d{}_p{}", (ctx.n_days, ctx.n_people), fixed_offs)
+        for d in range(ctx.n_days):
             for p in range(ctx.n_people):
-                var_name = f"shift_d{d}_s{s}_p{p}"
-                ctx.model_vars[var_name] = ctx.shifts[(d, s, p)] = ctx.model.NewBoolVar(var_name)
+                dp_shifts_sum = count_assigned(ctx, [d], [p], range(ctx.n_shift_types))
+                off = ctx.offs[(d, p)]
+                # Ref: https://github.com/google/or-tools/blob/master/ortools/sat/docs/channeling.md
+                ctx.model.Add(dp_shifts_sum == 0).OnlyEnforceIf(off)
+                ctx.model.Add(dp_shifts_sum != 0).OnlyEnforceIf(off.Not())
+
+    logging.info("Adding preferences (including constraints)...")
+    # TODO: Check no duplicated preferences
+    # TODO: Check no overlapping preferences
+    for i, preference in enumerate(ctx.preferences):
+        with profiler.phase("preference", ctx.model, preference_idx=i, type=preference.type):
+            preference_types.PREFERENCE_TYPES_TO_FUNC[preference.type](ctx, preference, i)
+
+    # Define objective (i.e., soft constraints)
+    with profiler.phase("objective", ctx.model):
+        ctx.model.Maximize(ctx.objective)
+
+def schedule(filepath: str | NurseSchedulingData, deterministic=False, avoid_solution=None, prettify=False, timeout: int | None = None, profiler: Profiler | None = None,
+             cache_dir: str | None = None, cache_max_bytes: int = cache.DEFAULT_CACHE_MAX_BYTES, hint_solution: dict | str | None = None,
+             num_workers: int | None = None, solver_profile: str | None = None, solver_parameters: dict | None = None,
+             fixed_solution: dict | None = None, fixed_solution_status: str = 'FEASIBLE',
+             symmetry_breaking: bool = False, dump_path: str | None = None) -> ScheduleResult:
+    """Schedule and return the best schedule, see `schedule_top_k` for the arguments."""
+    return schedule_top_k(
+        filepath, 1, deterministic=deterministic, avoid_solution=avoid_solution, prettify=prettify, timeout=timeout, profiler=profiler,
+        cache_dir=cache_dir, cache_max_bytes=cache_max_bytes, hint_solution=hint_solution, num_workers=num_workers,
+        solver_profile=solver_profile, solver_parameters=solver_parameters, fixed_solution=fixed_solution,
+        fixed_solution_status=fixed_solution_status, symmetry_breaking=symmetry_breaking, dump_path=dump_path,
+    )[0]
+
+def schedule_top_k(filepath: str | NurseSchedulingData, k: int, deterministic=False, avoid_solution=None, prettify=False, timeout: int | None = None, profiler: Profiler | None = None,
+                   cache_dir: str | None = None, cache_max_bytes: int = cache.DEFAULT_CACHE_MAX_BYTES, hint_solution: dict | str | None = None,
+                   num_workers: int | None = None, solver_profile: str | None = None, solver_parameters: dict | None = None,
+                   fixed_solution: dict | None = None, fixed_solution_status: str = 'FEASIBLE',
+                   symmetry_breaking: bool = False, dump_path: str | None = None) -> list[ScheduleResult]:
+    """Schedule and return the `k` best distinct schedules with a single model build.
+
+    After each solve, a no-good cut excluding the found shift assignments is
+    added to the same model, and the model is solved again. Each result is a
+    `ScheduleResult` as returned by `schedule`, which also unpacks as the
+    `(df, solution, score, status, cell_export_info)` tuple. Fewer than `k` results are returned if no more distinct
+    schedules exist, so the optimum is unique if and only if
+    `schedule_top_k(filepath, 2)` returns a single result or two results with
+    different scores. If no solution is found at all, the single result has
+    `None` fields except for the status. Any status other than INFEASIBLE
+    when searching for a later solution (e.g., MODEL_INVALID) raises a
+    `ValueError`, instead of being reported as no more distinct schedules.
+
+    Note that the schedules are only the `k` best if each solve is optimal.
+
+    Before building the model, cheap necessary conditions for feasibility
+    are checked (see `precheck.check_feasibility`). If any of them fails, the
+    problems are logged as warnings and the status is INFEASIBLE.
+
+    `filepath` may also be an already loaded scenario. `fixed_solution` fixes
+    the given shift assignments, e.g., to evaluate a schedule produced
+    elsewhere against the full model, in which case the status is reported
+    as `fixed_solution_status` (i.e., FEASIBLE by default) instead of OPTIMAL.
+
+    `symmetry_breaking` orders the shift assignments of interchangeable
+    people (see `symmetry.add_symmetry_breaking`), so the schedules returned
+    are distinct up to swapping such people.
+
+    The CP-SAT parameters start from the named `solver_profile` (see
+    `solver_profiles.SOLVER_PROFILES`, defaults to the scenario's
+    `solver.profile`), followed by the scenario's `solver.parameters`, the
+    raw `solver_parameters` overrides, and finally `num_workers`, `timeout`,
+    and `deterministic`. `num_workers` limits the number of CP-SAT search
+    workers (defaults to all cores), and is ignored if `deterministic` is set.
+
+    `dump_path` writes the values of all named variables of each solution to
+    a JSON Lines file (see `exporter.export_variables`), e.g., for debugging.
+    """
+    if k < 1:
+        raise ValueError(f"k must be positive, but got {k}")
+    if profiler is None:
+        profiler = Profiler(enabled=False)
+    if isinstance(filepath, NurseSchedulingData):
+        scenario = filepath
+    else:
+        logging.info(f"Loading scenario from '{filepath}'...")
+        with profiler.phase("load"):
+            data = load_yaml(filepath)
+        with profiler.phase("validate"):
+            scenario = NurseSchedulingData(**data)
+
+    logging.info("Extracting scenario data...")
+    with profiler.phase("create_context"):
+        ctx = create_context(scenario)
+    with profiler.phase("precheck"):
+        problems = precheck.check_feasibility(ctx)
+    if problems:
+        for problem in problems[:MAX_LOGGED_PROBLEMS]:
+            logging.warning(problem)
+        if len(problems) > MAX_LOGGED_PROBLEMS:
+            logging.warning(f"... and {len(problems) - MAX_LOGGED_PROBLEMS} more problems")
+        logging.info("Proven infeasible by the pre-check!")
+        return [ScheduleResult(ctx, 'INFEASIBLE')]
+    key = cache.cache_key(scenario) if cache_dir is not None else None
+    solver_config = scenario.solver
+    del scenario
+
+    logging.info("Initializing solver model...")
+    is_cached = False
+    if cache_dir is not None:
+        with profiler.phase("load_cached_model") as record:
+            is_cached = cache.load_model(ctx, cache_dir, key)
+            record['hit'] = is_cached
+    if is_cached:
+        logging.info(f"Loaded cached model from '{cache_dir}'")
+    else:
+        build_model(ctx, profiler)
+        if cache_dir is not None:
+            with profiler.phase("save_cached_model"):
+                cache.save_model(ctx, cache_dir, key, cache_max_bytes)
+
+    if symmetry_breaking:
+        with profiler.phase("symmetry_breaking", ctx.model):
+            symmetry.add_symmetry_breaking(ctx)
 
     if avoid_solution is not None:
         avoid_solution_vars = []
@@ -116,50 +246,40 @@ def schedule(filepath: str, deterministic=False, avoid_solution=None, prettify=F
         # Add constraint that at least one variable must be different from the solution to avoid
         ctx.model.AddBoolOr(avoid_solution_vars)
 
-    logging.info("Creating off variables...")
-    for d in range(ctx.n_days):
-        for p in range(ctx.n_people):
-            dp_shifts_sum = sum(ctx.shifts[(d, s, p)] for s in range(ctx.n_shift_types))
-            var_name = f"off_d{d}_p{p}"
-            ctx.model_vars[var_name] = ctx.offs[(d, p)] = ortools_expression_to_bool_var(
-                ctx.model, var_name,
-                dp_shifts_sum == 0,
-                dp_shifts_sum != 0,
-            )
-
-    logging.info("Creating maps for faster lookup...")
-    ctx.map_ds_p = {
-        (d, s): {p for p in range(ctx.n_people) if (d, s, p) in ctx.shifts}
-        for (d, s) in itertools.product(range(ctx.n_days), range(ctx.n_shift_types))
-    }
-    ctx.map_dp_s = {
-        (d, p): {s for s in range(ctx.n_shift_types) if (d, s, p) in ctx.shifts}
-        for (d, p) in itertools.product(range(ctx.n_days), range(ctx.n_people))
-    }
-    ctx.map_d_sp = {
-        d: {(s, p) for (s, p) in itertools.product(range(ctx.n_shift_types), range(ctx.n_people)) if (d, s, p) in ctx.shifts}
-        for d in range(ctx.n_days)
-    }
-    ctx.map_s_dp = {
-        s: {(d, p) for (d, p) in itertools.product(range(ctx.n_days), range(ctx.n_people)) if (d, s, p) in ctx.shifts}
-        for s in range(ctx.n_shift_types)
-    }
-    ctx.map_p_ds = {
-        p: {(d, s) for (d, s) in itertools.product(range(ctx.n_days), range(ctx.n_shift_types)) if (d, s, p) in ctx.shifts}
-        for p in range(ctx.n_people)
-    }
+    if fixed_solution is not None:
+        logging.info("Fixing solution...")
+        for (d, s, p), value in fixed_solution.items():
+            if value not in (0, 1):
+                raise ValueError(f"Invalid value: {value}")
+            ctx.model.Add(ctx.shifts[(d, s, p)] == value)
 
-    logging.info("Adding preferences (including constraints)...")
-    # TODO: Check no duplicated preferences
-    # TODO: Check no overlapping preferences
-    for i, preference in enumerate(ctx.preferences):
-        preference_types.PREFERENCE_TYPES_TO_FUNC[preference.type](ctx, preference, i)
-
-    # Define objective (i.e., soft constraints)
-    ctx.model.Maximize(ctx.objective)
+    hint = None
+    if hint_solution is not None:
+        logging.info("Adding solution hint...")
+        if isinstance(hint_solution, str):
+            hint_solution = load_solution(hint_solution, ctx)
+        hint = {}
+        for (d, s, p), value in hint_solution.items():
+            if (d, s, p) not in ctx.shifts:
+                continue
+            if value not in (0, 1):
+                raise ValueError(f"Invalid value: {value}")
+            if not ctx.shifts.free[d, s, p]:
+                # Assignments fixed by the hard constraints are constants, which cannot be hinted
+                continue
+            hint[(d, s, p)] = value
+            ctx.model.AddHint(ctx.shifts[(d, s, p)], value)
+        logging.info(f"Hinted {len(hint)} of {int(np.count_nonzero(ctx.shifts.free))} free shift assignments")
 
     logging.info("Initializing solver...")
     solver = cp_model.CpSolver()
+    if solver_profile is None and solver_config is not None:
+        solver_profile = solver_config.profile
+    solver.parameters.CopyFrom(solver_profiles.create_parameters(
+        solver_profile, solver_config.parameters if solver_config is not None else None, solver_parameters))
+    if num_workers is not None and not deterministic:
+        logging.info(f"Using {num_workers} solver workers")
+        solver.parameters.num_workers = num_workers
     if deterministic:
         logging.info("Configuring deterministic solver...")
         solver.parameters.random_seed = 0
@@ -169,6 +289,44 @@ def schedule(filepath: str, deterministic=False, avoid_solution=None, prettify=F
         # Ref: https://github.com/google/or-tools/blob/stable/ortools/sat/sat_parameters.proto
         # ctx.model.add_decision_strategy(list(ctx.shifts.values()), cp_model.CHOOSE_FIRST, cp_model.SELECT_MIN_VALUE)
 
+    # Configure timeout (max_time_in_seconds) if provided
+    if timeout is not None:
+        try:
+            solver.parameters.max_time_in_seconds = float(timeout)
+            logging.info(f"Solver time limit set to {timeout} seconds")
+        except Exception:
+            logging.warning("Unable to set solver timeout parameter; proceeding without time limit")
+    logging.info(f"Solver profile: {solver_profile or 'default'}, parameters: {solver_profiles.to_dict(solver.parameters)}")
+
+    results = []
+    with open(dump_path, 'w') if dump_path is not None else contextlib.nullcontext() as dump_file:
+        for i in range(k):
+            if i > 0:
+                # Assignments fixed by the hard constraints are the same in all solutions
+                solution = {key: value for key, value in results[-1].solution.items() if ctx.shifts.free[key]}
+                logging.info(f"Excluding solution #{i} and searching for the next best solution...")
+                # Add a no-good cut so that at least one shift assignment must differ from the previous solution
+                ctx.model.AddBoolOr([ctx.shifts[key] if value == 0 else ctx.shifts[key].Not() for key, value in solution.items()])
+                # Start the search from the previous solution
+                ctx.model.ClearHints()
+                for key, value in solution.items():
+                    ctx.model.AddHint(ctx.shifts[key], value)
+                hint = None
+            result = _solve(ctx, solver, profiler, prettify, hint, fixed_solution_status if fixed_solution is not None else None)
+            if result.values is None and i > 0:
+                if result.status != 'INFEASIBLE':
+                    raise ValueError(f"Failed to search for solution #{i + 1}! Status: {result.status}")
+                # No more distinct schedules
+                break
+            results.append(result)
+            if result.values is None:
+                break
+            if dump_file is not None:
+                with profiler.phase("dump"):
+                    exporter.export_variables(ctx, result.values, dump_file, i)
+    return results
+
+def _solve(ctx: Context, solver: cp_model.CpSolver, profiler: Profiler, prettify: bool, hint: dict | None, fixed_solution_status: str | None = None):
     class PartialSolutionPrinter(cp_model.CpSolverSolutionCallback):
         """Print intermediate solutions."""
         def __init__(self):
@@ -189,17 +347,14 @@ def schedule(filepath: str, deterministic=False, avoid_solution=None, prettify=F
             logging.info(f"elapsed time: {elapsed_time:.2f}s")
     solution_printer = PartialSolutionPrinter()
 
-    # Configure timeout (max_time_in_seconds) if provided
-    if timeout is not None:
-        try:
-            solver.parameters.max_time_in_seconds = float(timeout)
-            logging.info(f"Solver time limit set to {timeout} seconds")
-        except Exception:
-            logging.warning("Unable to set solver timeout parameter; proceeding without time limit")
-
     logging.info("Solving and showing partial results...")
     # The CpSolver will respect max_time_in_seconds and return when the time limit is reached.
-    status = solver.Solve(ctx.model, solution_printer)
+    with profiler.phase("solve", parameters=solver_profiles.to_dict(solver.parameters)) as record:
+        status = solver.Solve(ctx.model, solution_printer)
+        record['status'] = solver.StatusName(status)
+        record['conflicts'] = solver.NumConflicts()
+        record['branches'] = solver.NumBranches()
+        record['solver_wall_time'] = solver.WallTime()
 
     logging.info(f"Status: {solver.StatusName(status)}")
 
@@ -211,6 +366,7 @@ def schedule(filepath: str, deterministic=False, avoid_solution=None, prettify=F
         logging.info("Feasible solution found!")
     elif status == cp_model.INFEASIBLE:
         logging.info("Proven infeasible!")
+        logging.info("Use `diagnose.diagnose` (or the --diagnose CLI option) to find conflicting preferences")
     elif status == cp_model.MODEL_INVALID:
         logging.info("Model invalid!")
         logging.info("Validation Info:")
@@ -219,32 +375,35 @@ def schedule(filepath: str, deterministic=False, avoid_solution=None, prettify=F
         logging.info("No solution found!")
         raise ValueError(f"No solution found! Status: {solver.StatusName(status)}")
     ctx.solver_status = solver.StatusName(status)
+    if fixed_solution_status is not None and status == cp_model.OPTIMAL:
+        # A schedule with fixed shift assignments is only evaluated, not optimized
+        ctx.solver_status = fixed_solution_status
 
     logging.info("Statistics:")
     logging.info(f"  - conflicts: {solver.NumConflicts()}")
     logging.info(f"  - branches : {solver.NumBranches()}")
     logging.info(f"  - wall time: {solver.WallTime()}s")
-    logging.debug("Variables:")
-    for k, v in ctx.model_vars.items():
-        try:
-            logging.debug(f"  - {k}: {solver.Value(v)}")
-        except Exception as e:
-            logging.debug(f"  - {k}: [Error: {e}]")
-    logging.debug("Reports:")
-    for report in ctx.reports:
-        val = solver.Value(report.variable)
-        if report.skip_condition(val):
-            continue
-        logging.debug(f"  - {report.description}: {val}")
-
-    logging.info(f"Done.")
 
     if not found:
-        return None, None, None, ctx.solver_status, None
-
-    df, cell_export_info = exporter.get_people_versus_date_dataframe(ctx, solver, prettify=prettify)
-    solution = {}
-    for (d, s, p) in ctx.shifts:
-        solution[(d, s, p)] = solver.Value(ctx.shifts[(d, s, p)])
-    # TODO: Better way to return?
-    return df, solution, solver.Value(ctx.objective), ctx.solver_status, cell_export_info
+        logging.info(f"Done.")
+        return ScheduleResult(ctx, ctx.solver_status, parameters=solver_profiles.to_dict(solver.parameters))
+
+    with profiler.phase("read_solution"):
+        result = ScheduleResult(
+            ctx, ctx.solver_status, np.array(solver.response_proto.solution), solver.Value(ctx.objective),
+            prettify=prettify, parameters=solver_profiles.to_dict(solver.parameters),
+        )
+
+    if hint:
+        keys = tuple(np.array(list(hint.keys())).T)
+        n_kept = int(np.count_nonzero(result.shifts[keys] == np.array(list(hint.values()))))
+        result.hint_agreement = n_kept / len(hint)
+        logging.info(f"Solution hint kept: {n_kept}/{len(hint)} ({result.hint_agreement:.1%}) hinted shift assignments")
+
+    if logging.getLogger().isEnabledFor(logging.DEBUG):
+        logging.debug("Reports:")
+        for violation in result.violations:
+            logging.debug(f"  - {violation['description']}: {violation['value']}")
+
+    logging.info(f"Done.")
+    return result
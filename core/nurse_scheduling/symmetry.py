@@ -0,0 +1,96 @@
+"""
+This file is part of Nurse Scheduling Project, see <https://github.com/j3soon/nurse-scheduling>.
+
+Copyright (C) 2023-2025 Johnson Sun
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as
+published by the Free Software Foundation, either version 3 of the
+License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+# Symmetry breaking for interchangeable people.
+# People are interchangeable if swapping their shift assignments maps every
+# solution to a solution with the same score, which is the case if they
+# appear in exactly the same preferences and have the same history.
+
+import itertools
+import logging
+from typing import List
+
+from . import models, utils
+from .context import Context
+
+def _memberships(ctx: Context, pids) -> set:
+    return set(utils.parse_pids(pids, ctx.map_pid_p))
+
+def _nested_memberships(ctx: Context, elements) -> List[set]:
+    return [
+        set(itertools.chain.from_iterable(
+            utils.parse_pids(pid, ctx.map_pid_p) for pid in (element if isinstance(element, list) else [element])
+        ))
+        for element in elements
+    ]
+
+def find_interchangeable_people(ctx: Context) -> List[List[int]]:
+    """Returns the equivalence classes (with at least two people) of interchangeable person indices."""
+    # Collect the sets of people each preference refers to, directly or through groups
+    pref_sets = []
+    for preference in ctx.preferences:
+        if preference.type in (models.SHIFT_REQUEST, models.SHIFT_TYPE_SUCCESSIONS, models.SHIFT_COUNT):
+            pref_sets.append([_memberships(ctx, preference.person)])
+        elif preference.type == models.SHIFT_TYPE_REQUIREMENT:
+            if preference.qualifiedPeople is not None:
+                pref_sets.append([_memberships(ctx, preference.qualifiedPeople)])
+        elif preference.type == models.SHIFT_AFFINITY:
+            pref_sets.append(_nested_memberships(ctx, preference.people1) + _nested_memberships(ctx, preference.people2))
+        elif preference.type != models.AT_MOST_ONE_SHIFT_PER_DAY:
+            # Unknown preference types may treat each person differently
+            pref_sets.append([{p} for p in range(ctx.n_people)])
+    classes = {}
+    for p in range(ctx.n_people):
+        signature = (
+            tuple(ctx.people.items[p].history or ()),
+            tuple(tuple(p in ps for ps in sets) for sets in pref_sets),
+        )
+        classes.setdefault(signature, []).append(p)
+    return [ps for ps in classes.values() if len(ps) >= 2]
+
+def add_lex_leq(ctx: Context, xs: list, ys: list):
+    """Constrains the boolean vector `xs` to be lexicographically less than or equal to `ys`."""
+    # eq is true if all previous elements are equal, which forces xs[i] <= ys[i]
+    eq = None
+    for i, (x, y) in enumerate(zip(xs, ys)):
+        prefix = [eq.Not()] if eq is not None else []
+        ctx.model.AddBoolOr(prefix + [x.Not(), y])
+        if i == len(xs) - 1:
+            break
+        next_eq = ctx.model.NewBoolVar("")
+        ctx.model.AddBoolOr(prefix + [x, y, next_eq])
+        ctx.model.AddBoolOr(prefix + [x.Not(), y.Not(), next_eq])
+        eq = next_eq
+
+def add_symmetry_breaking(ctx: Context) -> List[List[int]]:
+    """Orders the shift assignments of interchangeable people lexicographically, and returns their classes.
+
+    Within each class, the assignment of each person (as a vector over days
+    and shift types) must be lexicographically less than or equal to the one
+    of the next person. Since this removes the symmetric variants of each
+    solution, a fixed solution may become infeasible, and avoiding a solution
+    also avoids its symmetric variants.
+    """
+    classes = find_interchangeable_people(ctx)
+    for ps in classes:
+        rows = [[ctx.shifts[(d, s, p)] for d in range(ctx.n_days) for s in range(ctx.n_shift_types)] for p in ps]
+        for xs, ys in zip(rows, rows[1:]):
+            add_lex_leq(ctx, xs, ys)
+    logging.info(f"Added symmetry breaking for {len(classes)} classes of interchangeable people with sizes {[len(ps) for ps in classes]}")
+    return classes
@@ -20,8 +20,9 @@ along with this program.  If not, see <https://www.gnu.org/licenses/>.
 import datetime
 import math
 import re
+from ortools.sat.python import cp_model
 from .models import DateRange
-from .constants import MAP_WEEKDAY_TO_STR, MAP_DATE_KEYWORD_TO_FILTER
+from .constants import MAP_WEEKDAY_TO_STR, MAP_DATE_KEYWORD_TO_FILTER, OFF_sid
 
 def ensure_list(val):
     if val is None:
@@ -38,14 +39,78 @@ def ortools_expression_to_bool_var(
     model.Add(false_expression).OnlyEnforceIf(var.Not())
     return var
 
-def add_objective(ctx, weight, expression):
+def add_hard_constraint(ctx, constraint, preference_idx, d=None):
+    # In diagnose mode, guard the constraint with an assumption literal per (preference_idx, d)
+    if ctx.assumptions is None:
+        return constraint
+    key = (preference_idx, d)
+    if key not in ctx.assumptions:
+        ctx.assumptions[key] = ctx.model.NewBoolVar(f"assumption_pref_{preference_idx}_d_{d}")
+    return constraint.OnlyEnforceIf(ctx.assumptions[key])
+
+def add_objective(ctx, weight, expression, preference_idx, d=None):
     if weight == math.inf:
-        ctx.model.Add(expression == 1)
+        add_hard_constraint(ctx, ctx.model.Add(expression == 1), preference_idx, d)
     elif weight == -math.inf:
-        ctx.model.Add(expression == 0)
+        add_hard_constraint(ctx, ctx.model.Add(expression == 0), preference_idx, d)
     else:
         ctx.objective += weight * expression
 
+def _assigned(ctx, d, s, p):
+    # Returns the variable of person (p) working shift type (s) on day (d), where (s) may be OFF
+    return ctx.shifts[(d, s, p)] if s != OFF_sid else ctx.offs[(d, p)]
+
+def _join(indices):
+    return '_'.join(map(str, indices))
+
+def works(ctx, d, p):
+    """Returns the literal that person (p) works any shift on day (d)."""
+    return ctx.offs[(d, p)].Not()
+
+def any_assigned(ctx, ds, ps, ss):
+    """Returns the shared literal that is 1 if and only if any of the people (ps)
+    works any of the shift types (ss) on any of the days (ds), where OFF is
+    included in (ss) as `OFF_sid`."""
+    ds, ps, ss = (tuple(sorted(set(map(int, x)))) for x in (ds, ps, ss))
+    if len(ds) == 1 and len(ps) == 1 and len(ss) == 1:
+        return _assigned(ctx, ds[0], ss[0], ps[0])
+    key = ('any', ds, ps, ss)
+    if key not in ctx.subexpressions:
+        lits = [_assigned(ctx, d, s, p) for d in ds for p in ps for s in ss]
+        if len(lits) == 0:
+            ctx.subexpressions[key] = ctx.model.NewConstant(0)
+        else:
+            varname = f"any_d_{_join(ds)}_p_{_join(ps)}_s_{_join(ss)}"
+            ctx.model_vars[varname] = ctx.subexpressions[key] = var = ctx.model.NewBoolVar(varname)
+            ctx.model.AddMaxEquality(var, lits)
+    return ctx.subexpressions[key]
+
+# A sum used by two calls (e.g., the shifts of a person on a day, used by the
+# off channeling and by `at most one shift per day`) is cheaper to repeat in
+# both constraints than to share through an extra variable and equality
+MIN_SHARED_COUNT_USES = 3
+
+def count_assigned(ctx, ds, ps, ss):
+    """Returns the shared expression of the number of (d, s, p) assignments of
+    the people (ps) to the shift types (ss) on the days (ds), where OFF is
+    included in (ss) as `OFF_sid`. Repeated indices are counted repeatedly.
+
+    The sum itself is returned until it is used `MIN_SHARED_COUNT_USES`
+    times, after which it is stored in a single (unnamed) integer variable
+    that is returned instead."""
+    ds, ps, ss = (tuple(sorted(map(int, x))) for x in (ds, ps, ss))
+    if len(ds) * len(ps) * len(ss) <= 1:
+        return sum(_assigned(ctx, d, s, p) for d in ds for p in ps for s in ss)
+    key = ('count', ds, ps, ss)
+    ctx.subexpression_uses[key] = ctx.subexpression_uses.get(key, 0) + 1
+    if key not in ctx.subexpressions:
+        ctx.subexpressions[key] = cp_model.LinearExpr.sum([_assigned(ctx, d, s, p) for d in ds for p in ps for s in ss])
+    elif ctx.subexpression_uses[key] == MIN_SHARED_COUNT_USES:
+        var = ctx.model.NewIntVar(0, len(ds) * len(ps) * len(ss), "")
+        ctx.model.Add(var == ctx.subexpressions[key])
+        ctx.subexpressions[key] = var
+    return ctx.subexpressions[key]
+
 def _parse_single_date(date: str, date_range: DateRange) -> datetime.date:
     startdate, enddate = date_range.startDate, date_range.endDate
     error_details = f'- Start date: {startdate}\n- End date: {enddate}\n'
@@ -0,0 +1,111 @@
+"""
+This file is part of Nurse Scheduling Project, see <https://github.com/j3soon/nurse-scheduling>.
+
+Copyright (C) 2023-2025 Johnson Sun
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as
+published by the Free Software Foundation, either version 3 of the
+License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from collections.abc import Mapping
+
+import numpy as np
+from ortools.sat.python import cp_model
+
+class BoolVarArray(Mapping):
+    """A dense N-dimensional array of CP-SAT boolean variables.
+
+    The variables are created as a contiguous block in the model (except for
+    fixed entries, which share the constants of the model), and only their
+    proto indices are kept (in `index`). The `IntVar` objects are owned
+    by the model and looked up on access, and variable names are generated
+    on demand from `name_format` instead of being stored in the model.
+
+    The array can be used as a read-only mapping from index tuples to
+    variables, e.g., `shifts[(d, s, p)]`. `mask` marks the index tuples that
+    have a variable, and is the single index used for slice queries such as
+    "which people can work shift type (s) on day (d)", i.e.,
+    `np.flatnonzero(shifts.mask[d, s])`. `free` marks the entries that are
+    variables instead of shared constants, e.g., the only entries that can be
+    hinted, since a hint must not contain the same variable twice.
+    """
+
+    def __init__(self, model: cp_model.CpModel, name_format: str, shape: tuple[int, ...], fixed: np.ndarray | None = None):
+        """Creates the variables of an array of `shape`.
+
+        If `fixed` is given, the entries that are 0 or 1 are constants in the
+        model instead of variables, and only the entries that are -1 are
+        created as variables.
+        """
+        self.model = model
+        self.name_format = name_format
+        self.shape = tuple(shape)
+        if fixed is None:
+            fixed = np.full(self.shape, -1, dtype=np.int8)
+        free = fixed < 0
+        start = len(model.proto.variables)
+        for _ in range(int(np.count_nonzero(free))):
+            model.new_bool_var("")
+        self.index = np.empty(self.shape, dtype=np.int64)
+        self.index[free] = np.arange(start, len(model.proto.variables), dtype=np.int64)
+        for value in (0, 1):
+            if (fixed == value).any():
+                self.index[fixed == value] = model.new_constant(value).index
+        self.mask = np.ones(self.shape, dtype=bool)
+        self.free = free
+
+    @classmethod
+    def from_index(cls, model: cp_model.CpModel, name_format: str, index: np.ndarray, mask: np.ndarray) -> "BoolVarArray":
+        """Wraps variables that already exist in `model` (e.g., a model loaded from a proto)."""
+        array = cls.__new__(cls)
+        array.model = model
+        array.name_format = name_format
+        array.shape = tuple(index.shape)
+        array.index = index
+        array.mask = mask
+        # Constants are variables with a single-value domain
+        is_constant = np.array([len(v.domain) == 2 and v.domain[0] == v.domain[1] for v in model.proto.variables], dtype=bool)
+        array.free = ~is_constant[index]
+        return array
+
+    def _check_key(self, key) -> tuple[int, ...]:
+        if not isinstance(key, tuple) or len(key) != len(self.shape):
+            raise KeyError(key)
+        for k, n in zip(key, self.shape):
+            # Reject negative indices explicitly, since NumPy would wrap them around
+            if not isinstance(k, (int, np.integer)) or not 0 <= k < n:
+                raise KeyError(key)
+        if not self.mask[key]:
+            raise KeyError(key)
+        return key
+
+    def __getitem__(self, key) -> cp_model.IntVar:
+        key = self._check_key(key)
+        return self.model.get_bool_var_from_proto_index(int(self.index[key]))
+
+    def __contains__(self, key) -> bool:
+        try:
+            self._check_key(key)
+        except KeyError:
+            return False
+        return True
+
+    def __iter__(self):
+        return (tuple(map(int, key)) for key in zip(*np.nonzero(self.mask)))
+
+    def __len__(self) -> int:
+        return int(np.count_nonzero(self.mask))
+
+    def name(self, key) -> str:
+        """Returns the (generated) name of the variable at `key`."""
+        return self.name_format.format(*self._check_key(key))
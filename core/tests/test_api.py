@@ -0,0 +1,408 @@
+"""
+This file is part of Nurse Scheduling Project, see <https://github.com/j3soon/nurse-scheduling>.
+
+Copyright (C) 2023-2025 Johnson Sun
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as
+published by the Free Software Foundation, either version 3 of the
+License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+# Tests for the Python API that cannot be expressed as YAML test cases.
+
+import json
+import os
+
+import numpy as np
+import openpyxl
+import pytest
+from ortools.sat.python import cp_model
+
+import nurse_scheduling
+from nurse_scheduling import batch, cache, cli, decompose, diagnose, exporter, loader, models, precheck, rolling, scheduler, symmetry
+from nurse_scheduling.profiler import Profiler
+
+
+current_dir = os.path.dirname(os.path.realpath(__file__))
+testcases_dir = f"{current_dir}/testcases"
+
+def test_hint_solution_from_exported_roster(tmp_path):
+    filepath = f"{testcases_dir}/basics/03_4nurses_3shifts_7days.yaml"
+    df, solution, score, status, cell_export_info = nurse_scheduling.schedule(filepath)
+    for prettify, output_path in [(False, f"{tmp_path}/roster.csv"), (True, f"{tmp_path}/roster.xlsx")]:
+        df, _, _, _, cell_export_info = nurse_scheduling.schedule(filepath, prettify=prettify)
+        if output_path.endswith('.xlsx'):
+            exporter.export_to_excel(df, output_path, cell_export_info)
+        else:
+            exporter.export_to_csv(df, output_path)
+        ctx = scheduler.create_context(loader.load_data(filepath))
+        assert loader.load_solution(output_path, ctx) == solution
+        df2, solution2, score2, status2, _ = nurse_scheduling.schedule(filepath, hint_solution=output_path)
+        assert (solution2, score2, status2) == (solution, score, status)
+
+def test_profile_report(tmp_path):
+    filepath = f"{testcases_dir}/basics/03_4nurses_3shifts_7days.yaml"
+    for trace_memory in (False, True):
+        profiler = Profiler(trace_memory=trace_memory)
+        nurse_scheduling.schedule(filepath, profiler=profiler)
+        profiler.to_json(f"{tmp_path}/profile.json")
+        with open(f"{tmp_path}/profile.json") as f:
+            report = json.load(f)
+        assert report['total_wall_time'] == sum(record['wall_time'] for record in report['phases'])
+        phases = [record['phase'] for record in report['phases']]
+        assert phases[:4] == ['load', 'validate', 'create_context', 'precheck']
+        assert {'create_variables', 'objective', 'solve', 'read_solution'} <= set(phases)
+        preferences = [record for record in report['phases'] if record['phase'] == 'preference']
+        assert [record['preference_idx'] for record in preferences] == list(range(len(preferences)))
+        assert all(record['variables_added'] >= 0 and record['constraints_added'] >= 0 for record in preferences)
+        assert all((record['peak_memory_bytes'] is not None) == trace_memory for record in report['phases'])
+        solve = next(record for record in report['phases'] if record['phase'] == 'solve')
+        assert solve['status'] == 'OPTIMAL' and 'parameters' in solve
+
+def test_export_to_excel_fallback(tmp_path, monkeypatch):
+    filepath = f"{testcases_dir}/artificial/ortools/ex1_even_shift_distribution.yaml"
+    df, _, _, _, cell_export_info = nurse_scheduling.schedule(filepath, prettify=True)
+    assert cell_export_info
+    exporter.export_to_excel(df, f"{tmp_path}/streamed.xlsx", cell_export_info)
+    # Untested pandas versions fall back to `to_excel`, with the same result
+    monkeypatch.setattr(exporter, 'STREAMING_EXCEL_PANDAS_VERSIONS', ((0, 0), (0, 0)))
+    exporter.export_to_excel(df, f"{tmp_path}/reloaded.xlsx", cell_export_info)
+    def dump(path):
+        ws = openpyxl.load_workbook(path).active
+        return [ws.freeze_panes] + [
+            (cell.value, repr(cell.font), repr(cell.fill), repr(cell.alignment), repr(cell.border), cell.comment and cell.comment.text)
+            for row in ws.iter_rows() for cell in row
+        ]
+    assert dump(f"{tmp_path}/streamed.xlsx") == dump(f"{tmp_path}/reloaded.xlsx")
+
+def test_schedule_top_k_returns_distinct_schedules():
+    filepath = f"{testcases_dir}/basics/03_4nurses_3shifts_7days.yaml"
+    df, solution, score, status, _ = nurse_scheduling.schedule(filepath)
+    results = nurse_scheduling.schedule_top_k(filepath, 3)
+    assert len(results) == 3
+    assert results[0][1:4] == (solution, score, status)
+    solutions = [result[1] for result in results]
+    assert all(solutions[i] != solutions[j] for i in range(3) for j in range(i))
+    scores = [result[2] for result in results]
+    assert scores == sorted(scores, reverse=True)
+
+def test_schedule_top_k_matches_avoid_solution():
+    filepath = f"{testcases_dir}/basics/03_4nurses_3shifts_7days.yaml"
+    results = nurse_scheduling.schedule_top_k(filepath, 2)
+    df, solution, score, status, _ = nurse_scheduling.schedule(filepath)
+    df2, solution2, score2, status2, _ = nurse_scheduling.schedule(filepath, avoid_solution=solution)
+    assert results[0][1:4] == (solution, score, status)
+    assert results[1][2:4] == (score2, status2)
+    assert results[1][2] < results[0][2]
+
+def test_schedule_top_k_raises_on_invalid_model(monkeypatch):
+    filepath = f"{testcases_dir}/basics/03_4nurses_3shifts_7days.yaml"
+    solve = scheduler._solve
+    def solve_then_fail(ctx, *args, **kwargs):
+        if ctx.solver_status is not None:
+            return nurse_scheduling.ScheduleResult(ctx, 'MODEL_INVALID')
+        return solve(ctx, *args, **kwargs)
+    monkeypatch.setattr(scheduler, '_solve', solve_then_fail)
+    with pytest.raises(ValueError, match="MODEL_INVALID"):
+        nurse_scheduling.schedule_top_k(filepath, 2)
+
+def test_schedule_batch(tmp_path):
+    filepaths = [f"{testcases_dir}/basics/03_4nurses_3shifts_7days.yaml", f"{tmp_path}/invalid.yaml"]
+    with open(filepaths[1], 'w') as f:
+        f.write("apiVersion: alpha\n")
+    records = batch.schedule_batch(filepaths, f"{tmp_path}/out", max_jobs=2)
+    assert [record['input'] for record in records] == filepaths
+    assert records[0]['status'] == 'OPTIMAL' and records[0]['error'] is None
+    assert records[1]['status'] is None and records[1]['error'] is not None
+    df, _, score, _, _ = nurse_scheduling.schedule(filepaths[0])
+    with open(records[0]['output'], encoding='utf-8-sig') as f:
+        assert f.read() == df.to_csv(index=False, header=False)
+    assert records[0]['score'] == score
+    with open(f"{tmp_path}/out/{batch.SUMMARY_FILENAME}") as f:
+        assert sorted(json.loads(line)['input'] for line in f) == sorted(filepaths)
+
+def test_jobs_must_be_positive(tmp_path, monkeypatch, capsys):
+    filepath = f"{testcases_dir}/basics/03_4nurses_3shifts_7days.yaml"
+    with pytest.raises(ValueError, match="max_jobs must be positive"):
+        batch.schedule_batch([filepath], f"{tmp_path}/out", max_jobs=0)
+    with pytest.raises(ValueError, match="max_jobs must be positive"):
+        decompose.schedule_decomposed(filepath, max_jobs=0)
+    monkeypatch.setattr('sys.argv', ['nurse-scheduling', filepath, f"{tmp_path}/out", '--batch', '--jobs', '0'])
+    with pytest.raises(SystemExit) as e:
+        cli.main()
+    assert e.value.code == 1
+    assert "Error: --jobs must be positive" in capsys.readouterr().out
+    assert not os.path.exists(f"{tmp_path}/out")
+
+def test_schedule_rolling():
+    filepath = f"{testcases_dir}/basics/03_4nurses_3shifts_7days_unwanted_pattern_real_patterns.yaml"
+    df, solution, score, status, _ = nurse_scheduling.schedule(filepath)
+    # A single window is equivalent to scheduling the whole planning period
+    assert rolling.schedule_rolling(filepath, 7)[1:4] == (solution, score, status)
+    # Committed days are carried into later windows through the history
+    df2, solution2, score2, status2, _ = rolling.schedule_rolling(filepath, 3, 2)
+    assert status2 == 'FEASIBLE'
+    assert score2 == score
+    assert solution2.keys() == solution.keys()
+
+def test_schedule_decomposed():
+    filepath = f"{testcases_dir}/basics/03_4nurses_3shifts_4days_independent_wards.yaml"
+    ctx = scheduler.create_context(loader.load_data(filepath))
+    assert decompose.find_components(ctx) == [[0, 1], [2, 3]]
+    df, solution, score, status, _ = nurse_scheduling.schedule(filepath)
+    for max_jobs in (1, 2):
+        df2, solution2, score2, status2, _ = decompose.schedule_decomposed(filepath, max_jobs=max_jobs)
+        assert (score2, status2) == (score, status)
+        assert solution2.keys() == solution.keys()
+
+def test_minimax_shift_count_is_not_split():
+    filepath = f"{testcases_dir}/basics/03_3nurses_2shifts_7days_independent_wards_shift_count_max_abs.yaml"
+    ctx = scheduler.create_context(loader.load_data(filepath))
+    # The largest deviation couples the otherwise independent wards
+    assert decompose.find_components(ctx) == [[0, 1, 2]]
+    df, solution, score, status, _ = nurse_scheduling.schedule(filepath)
+    assert decompose.schedule_decomposed(filepath)[2:4] == (score, status)
+    window_preferences = rolling._window_preferences(ctx, solution, 2, 6)
+    shift_counts = [preference for preference in window_preferences if preference.type == models.SHIFT_COUNT]
+    assert len(shift_counts) == 1 and shift_counts[0].person == ['A1', 'B1', 'B2']
+
+def test_rolling_and_decomposed_failures_return_results():
+    filepath = f"{testcases_dir}/basics/03_2nurses_2shifts_7days_independent_wards_infeasible.yaml"
+    for result in (rolling.schedule_rolling(filepath, 3), decompose.schedule_decomposed(filepath, max_jobs=1)):
+        assert isinstance(result, nurse_scheduling.ScheduleResult)
+        assert (result.status, result.solution, result.df) == ('INFEASIBLE', None, None)
+
+def test_symmetry_breaking():
+    filepath = f"{testcases_dir}/basics/03_6nurses_3shifts_7days.yaml"
+    ctx = scheduler.create_context(loader.load_data(filepath))
+    assert symmetry.find_interchangeable_people(ctx) == [[0, 3], [1, 4], [2, 5]]
+    df, solution, score, status, _ = nurse_scheduling.schedule(filepath)
+    df2, solution2, score2, status2, _ = nurse_scheduling.schedule(filepath, symmetry_breaking=True)
+    assert (solution2, score2, status2) == (solution, score, status)
+
+
+def test_symmetry_breaking_is_forwarded(monkeypatch):
+    filepath = f"{testcases_dir}/basics/03_6nurses_3shifts_7days.yaml"
+    df, solution, score, status, _ = nurse_scheduling.schedule(filepath)
+    calls = []
+    add_symmetry_breaking = symmetry.add_symmetry_breaking
+    monkeypatch.setattr(symmetry, 'add_symmetry_breaking', lambda ctx: calls.append(ctx) or add_symmetry_breaking(ctx))
+    assert decompose.schedule_decomposed(filepath, max_jobs=1, symmetry_breaking=True)[2:4] == (score, status)
+    assert rolling.schedule_rolling(filepath, 7, symmetry_breaking=True)[2:4] == (score, status)
+    assert rolling.schedule_rolling(filepath, 4, 3, symmetry_breaking=True).status == 'FEASIBLE'
+    # One single-model solve each, and one solve per window (but not the evaluation of the stitched schedule)
+    assert len(calls) == 4
+
+def test_precheck_reports_offending_shifts():
+    filepath = f"{testcases_dir}/basics/02_3nurses_1shift_1day_infeasible_qualified_people.yaml"
+    ctx = scheduler.create_context(loader.load_data(filepath))
+    assert "Shift type D on 2023-08-18 requires 2 people, but only 1 people are qualified" in precheck.check_feasibility(ctx)
+    filepath = f"{testcases_dir}/basics/02_3nurses_1shift_1day_infeasible_shift_request_contradiction.yaml"
+    ctx = scheduler.create_context(loader.load_data(filepath))
+    assert precheck.check_feasibility(ctx) == ["Person 0 is required to be both off and working on 2023-08-18"]
+
+def test_diagnose_infeasible_scenario():
+    filepath = f"{testcases_dir}/basics/02_3nurses_1shift_1day_infeasible_shift_request_contradiction.yaml"
+    conflicts = diagnose.diagnose(filepath)
+    assert [(conflict['preference_idx'], conflict['date']) for conflict in conflicts] == [(2, '2023-08-18'), (3, '2023-08-18')]
+    assert diagnose.diagnose(f"{testcases_dir}/basics/03_4nurses_3shifts_7days.yaml") == []
+
+def test_diagnose_reports_invalid_model(monkeypatch):
+    class InvalidModelSolver(cp_model.CpSolver):
+        def Solve(self, model, *args, **kwargs):
+            return cp_model.MODEL_INVALID
+    monkeypatch.setattr(diagnose.cp_model, 'CpSolver', InvalidModelSolver)
+    with pytest.raises(ValueError, match="MODEL_INVALID"):
+        diagnose.diagnose(f"{testcases_dir}/basics/03_4nurses_3shifts_7days.yaml")
+
+def _count_subexpressions(ctx, kind):
+    return sum(1 for key in ctx.subexpressions if key[0] == kind)
+
+def test_window_encoding_shares_any_assigned_literals():
+    filepath = f"{testcases_dir}/basics/03_4nurses_3shifts_7days_unwanted_pattern_real_patterns_nested_window_encoding.yaml"
+    scenario = loader.load_data(filepath)
+    ctx = scheduler.create_context(scenario)
+    scheduler.build_model(ctx, Profiler())
+    n_literals = _count_subexpressions(ctx, 'any')
+    assert n_literals > 0
+    # Duplicating a preference must not create new literals
+    scenario.preferences.append(scenario.preferences[2])
+    ctx = scheduler.create_context(scenario)
+    scheduler.build_model(ctx, Profiler())
+    assert _count_subexpressions(ctx, 'any') == n_literals
+
+def test_shift_affinity_shares_any_assigned_literals():
+    filepath = f"{testcases_dir}/basics/03_6nurses_3shifts_7days_shift_affinity_repel_multiple_people1_people2_nested_nested.yaml"
+    ctx = scheduler.create_context(loader.load_data(filepath))
+    scheduler.build_model(ctx, Profiler())
+    # One literal per (d, people set, shift set), where [2, 3] is shared by both preferences
+    assert _count_subexpressions(ctx, 'any') == 7 * 6
+
+def test_shift_count_shares_count_variables():
+    filepath = f"{testcases_dir}/basics/03_4nurses_3shifts_7days.yaml"
+    scenario = loader.load_data(filepath)
+    for _ in range(2):
+        scenario.preferences.append(models.ShiftCountPreference(
+            person='ALL', countDates='ALL', countShiftTypes='ALL',
+            expression=['x >= T', 'x <= T'], target=[1, 5], weight=-1,
+        ))
+    ctx = scheduler.create_context(scenario)
+    scheduler.build_model(ctx, Profiler())
+    # One count per (d, p) for the off variables, per (d, s) for the requirements,
+    # and per person for all shift count preferences
+    assert _count_subexpressions(ctx, 'count') == 7 * 4 + 7 * 3 + 4
+    # Only the (reused and long) count of each person is stored in a variable
+    count_vars = [value for key, value in ctx.subexpressions.items() if key[0] == 'count' and isinstance(value, cp_model.IntVar)]
+    assert len(count_vars) == 4 and all(var.Name() == "" for var in count_vars)
+
+def test_day_sums_are_not_shared_through_variables():
+    n_days, n_shift_types, n_people = 7, 10, 12
+    scenario = models.NurseSchedulingData(
+        apiVersion='alpha',
+        dates={'range': {'startDate': '2024-01-01', 'endDate': '2024-01-07'}},
+        people={'items': [{'id': f"P{p}"} for p in range(n_people)]},
+        shiftTypes={'items': [{'id': f"S{s}"} for s in range(n_shift_types)]},
+        preferences=[{'type': 'at most one shift per day'}] + [
+            {'type': 'shift type requirement', 'shiftType': f"S{s}", 'requiredNumPeople': 1} for s in range(n_shift_types)
+        ],
+    )
+    ctx = scheduler.create_context(scenario)
+    scheduler.build_model(ctx, Profiler(enabled=False))
+    # The sum of each (d, p) is used by the off channeling and by `at most one shift per day`,
+    # but is not stored in a variable of its own
+    assert len(ctx.model.proto.variables) == n_days * n_shift_types * n_people + n_days * n_people
+
+def test_fixed_assignments_are_constants():
+    filepath = f"{testcases_dir}/basics/03_4nurses_3shifts_7days_shift_type_requirement_qualified_people.yaml"
+    ctx = scheduler.create_context(loader.load_data(filepath))
+    fixed_shifts, fixed_offs = precheck.find_fixed_assignments(ctx)
+    # Person 0 is not qualified for any shift type, so is always off
+    assert (fixed_shifts[:, :, 0] == 0).all() and (fixed_offs[:, 0] == 1).all()
+    assert (fixed_shifts[:, :, 1:] == -1).all() and (fixed_offs[:, 1:] == -1).all()
+    scheduler.build_model(ctx, Profiler())
+    assert len(set(ctx.shifts.index[:, :, 0].flat) | set(ctx.offs.index[:, 0].flat)) == 2
+
+def test_hint_and_top_k_skip_fixed_assignments():
+    filepath = f"{testcases_dir}/basics/03_4nurses_3shifts_7days_shift_type_requirement_qualified_people.yaml"
+    result = nurse_scheduling.schedule(filepath)
+    # Person 0 is always off, so their shift assignments share the same constant
+    result2 = nurse_scheduling.schedule(filepath, hint_solution=result.solution)
+    assert (result2.solution, result2.score, result2.status) == (result.solution, result.score, result.status)
+    assert result2.hint_agreement == 1
+    results = nurse_scheduling.schedule_top_k(filepath, 3)
+    assert len(results) == 3
+    assert len({tuple(result.solution.items()) for result in results}) == 3
+
+def test_report_violations():
+    filepath = f"{testcases_dir}/basics/02_4nurses_3shifts_3days_shift_request_shift_type_mixed_off_shift_count_equals.yaml"
+    ctx = scheduler.create_context(loader.load_data(filepath))
+    scheduler.build_model(ctx, Profiler())
+    solver = cp_model.CpSolver()
+    assert solver.Solve(ctx.model) == cp_model.OPTIMAL
+    violations = ctx.reports.violations(np.array(solver.response_proto.solution))
+    # Person 0 requests shift type D on all days, but is always off
+    pref_2_violations = [violation for violation in violations if violation['preference_idx'] == 2]
+    assert [violation['description'] for violation in pref_2_violations] == [f"shift_request_pref_2_d_{d}_s_0_p_0_shifts" for d in range(3)]
+    assert all(violation['value'] == solver.Value(ctx.shifts[violation['index']]) == 0 for violation in pref_2_violations)
+
+def _cache_hits(profiler):
+    return [record['hit'] for record in profiler.records if record['phase'] == 'load_cached_model']
+
+def test_model_cache_hit_and_invalidation(tmp_path, monkeypatch):
+    filepath = f"{testcases_dir}/basics/03_4nurses_3shifts_7days.yaml"
+    scenario = loader.load_data(filepath)
+    profiler = Profiler()
+    result = nurse_scheduling.schedule(scenario, cache_dir=tmp_path, profiler=profiler)
+    cached = nurse_scheduling.schedule(scenario, cache_dir=tmp_path, profiler=profiler)
+    assert _cache_hits(profiler) == [False, True]
+    assert (cached.solution, cached.score, cached.status) == (result.solution, result.score, result.status)
+    # Changing the scenario invalidates the entry
+    changed = scenario.model_copy(update={'preferences': scenario.preferences[:-1]})
+    nurse_scheduling.schedule(changed, cache_dir=tmp_path, profiler=profiler)
+    assert _cache_hits(profiler)[-1] is False
+    # Changing the code invalidates all entries
+    monkeypatch.setattr(cache, '_library_version', lambda: "other")
+    nurse_scheduling.schedule(scenario, cache_dir=tmp_path, profiler=profiler)
+    assert _cache_hits(profiler)[-1] is False
+    assert len(os.listdir(tmp_path)) == 3
+
+def test_model_cache_ignores_solver_config(tmp_path):
+    filepath = f"{testcases_dir}/basics/03_4nurses_3shifts_7days.yaml"
+    scenario = loader.load_data(filepath)
+    tuned = scenario.model_copy(update={'solver': models.SolverConfig(profile='prove-optimal', parameters={'linearization_level': 2})})
+    assert cache.cache_key(tuned) == cache.cache_key(scenario)
+    profiler = Profiler()
+    nurse_scheduling.schedule(scenario, cache_dir=tmp_path, profiler=profiler)
+    nurse_scheduling.schedule(tuned, cache_dir=tmp_path, profiler=profiler)
+    assert _cache_hits(profiler) == [False, True]
+    assert len(os.listdir(tmp_path)) == 1
+
+def test_model_cache_evicts_least_recently_used(tmp_path):
+    filepath = f"{testcases_dir}/basics/03_4nurses_3shifts_7days.yaml"
+    scenario = loader.load_data(filepath)
+    keys = [cache.cache_key(scenario, i=i) for i in range(3)]
+    ctx = scheduler.create_context(scenario)
+    scheduler.build_model(ctx, Profiler(enabled=False))
+    for i, key in enumerate(keys):
+        cache.save_model(ctx, tmp_path, key)
+        os.utime(f"{tmp_path}/{key}.npz", (i, i))
+    # Loading an entry marks it as recently used
+    assert cache.load_model(scheduler.create_context(scenario), tmp_path, keys[0])
+    entry_size = os.path.getsize(f"{tmp_path}/{keys[0]}.npz")
+    cache.evict(tmp_path, 2 * entry_size)
+    assert sorted(os.listdir(tmp_path)) == sorted(f"{key}.npz" for key in (keys[0], keys[2]))
+    assert not cache.load_model(scheduler.create_context(scenario), tmp_path, keys[1])
+
+def test_cached_model_keeps_named_variables(tmp_path):
+    filepath = f"{testcases_dir}/basics/02_4nurses_3shifts_3days_shift_request_shift_type_mixed_off_shift_count_equals.yaml"
+    profiler = Profiler()
+    for name in ('miss', 'hit'):
+        nurse_scheduling.schedule(filepath, cache_dir=f"{tmp_path}/cache", profiler=profiler, deterministic=True,
+                                  dump_path=f"{tmp_path}/{name}.jsonl")
+    assert _cache_hits(profiler) == [False, True]
+    with open(f"{tmp_path}/miss.jsonl") as f_miss, open(f"{tmp_path}/hit.jsonl") as f_hit:
+        miss, hit = f_miss.read(), f_hit.read()
+    assert any(not json.loads(line)['name'].startswith(('shift_d', 'off_d')) for line in miss.splitlines())
+    assert hit == miss
+
+def test_cached_model_keeps_reports(tmp_path):
+    filepath = f"{testcases_dir}/basics/02_4nurses_3shifts_3days_shift_request_shift_type_mixed_off_shift_count_equals.yaml"
+    profiler = Profiler()
+    miss = nurse_scheduling.schedule(filepath, cache_dir=tmp_path, profiler=profiler)
+    hit = nurse_scheduling.schedule(filepath, cache_dir=tmp_path, profiler=profiler)
+    assert _cache_hits(profiler) == [False, True]
+    assert len(miss.violations) > 0
+    assert hit.violations == miss.violations
+
+def test_dump_variables(tmp_path):
+    filepath = f"{testcases_dir}/basics/03_4nurses_3shifts_7days.yaml"
+    dump_path = f"{tmp_path}/variables.jsonl"
+    results = nurse_scheduling.schedule_top_k(filepath, 2, dump_path=dump_path)
+    with open(dump_path) as f:
+        records = [json.loads(line) for line in f]
+    for i, (_, solution, _, _, _) in enumerate(results):
+        values = {record['name']: record['value'] for record in records if record['solution'] == i}
+        assert all(values[f"shift_d{d}_s{s}_p{p}"] == value for (d, s, p), value in solution.items())
+
+def test_schedule_result_is_lazy():
+    filepath = f"{testcases_dir}/basics/03_4nurses_3shifts_7days.yaml"
+    result = nurse_scheduling.schedule(filepath, prettify=True)
+    assert isinstance(result, nurse_scheduling.ScheduleResult)
+    assert result.shifts.shape == (7, 3, 4) and result.offs.shape == (7, 4)
+    assert ((result.shifts.sum(axis=1) == 0) == (result.offs == 1)).all()
+    # The DataFrame is only built on first access
+    assert '_dataframe' not in result.__dict__
+    df, solution, score, status, cell_export_info = result
+    assert '_dataframe' in result.__dict__
+    assert result[1:4] == (solution, score, status) and result[0] is df
+    assert all(result.shifts[key] == value for key, value in solution.items())
+    assert result.violations is not None
@@ -45,6 +45,7 @@ export default function SaveAndLoadPage() {
     peopleData,
     shiftTypeData,
     preferences,
+    solverData,
     loadFromYaml,
     filterAutoGeneratedState
   } = useSchedulingData();
@@ -73,7 +74,8 @@ export default function SaveAndLoadPage() {
     dates: dateData,
     people: peopleData,
     shiftTypes: shiftTypeData,
-    preferences
+    preferences,
+    ...(solverData ? { solver: solverData } : {})
   });
 
   // Add app version to the exported state
@@ -21,7 +21,7 @@
 'use client';
 
 import { useState, useEffect } from 'react';
-import { Item, Group, DateRange, ShiftTypeRequirementsPreference, ShiftRequestPreference, ShiftTypeSuccessionsPreference, ShiftCountPreference, ShiftAffinityPreference, DataType, Preference, AT_MOST_ONE_SHIFT_PER_DAY, SHIFT_TYPE_REQUIREMENT, SHIFT_REQUEST, SHIFT_TYPE_SUCCESSIONS, SHIFT_COUNT, SHIFT_AFFINITY } from '@/types/scheduling';
+import { Item, Group, DateRange, SolverConfig, ShiftTypeRequirementsPreference, ShiftRequestPreference, ShiftTypeSuccessionsPreference, ShiftCountPreference, ShiftAffinityPreference, DataType, Preference, AT_MOST_ONE_SHIFT_PER_DAY, SHIFT_TYPE_REQUIREMENT, SHIFT_REQUEST, SHIFT_TYPE_SUCCESSIONS, SHIFT_COUNT, SHIFT_AFFINITY } from '@/types/scheduling';
 import { ItemGroupEditorPageData } from '@/components/ItemGroupEditorPage';
 import { AUTO_GENERATED_ITEMS, AUTO_GENERATED_GROUPS, isReservedKeyword, filterAutoGenerated, API_VERSION, ALL } from '@/utils/keywords';
 import { ERROR_SHOULD_NOT_HAPPEN } from '@/constants/errors';
@@ -33,6 +33,7 @@ export interface SchedulingState {
   people: { items: Item[]; groups: Group[]; history: string[] };
   shiftTypes: { items: Item[]; groups: Group[] };
   preferences: Preference[];
+  solver?: SolverConfig;
 }
 
 interface HistoryState {
@@ -1156,7 +1157,9 @@ export function useSchedulingData() {
       },
       people: data.people || { items: [], groups: [], history: [] },
       shiftTypes: data.shiftTypes || { items: [], groups: [] },
-      preferences: data.preferences || []
+      preferences: data.preferences || [],
+      // Carried through as-is, since it is not edited in the UI
+      ...(data.solver ? { solver: data.solver } : {})
     });
 
     // If any ID is a number, convert it to a string
@@ -1239,6 +1242,7 @@ export function useSchedulingData() {
     dateData: historyState.state.dates,
     peopleData: historyState.state.people,
     shiftTypeData: historyState.state.shiftTypes,
+    solverData: historyState.state.solver,
 
     // Flattened preferences API
     preferences: historyState.state.preferences,
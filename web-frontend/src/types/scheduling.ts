@@ -61,7 +61,7 @@ export const SHIFT_TYPE_SUCCESSIONS = 'shift type successions';
 export const SHIFT_COUNT = 'shift count';
 export const SHIFT_AFFINITY = 'shift affinity';
 
-export const SUPPORTED_EXPRESSIONS = ['|x - T|^2', 'x >= T', 'x <= T', 'x > T', 'x < T', 'x = T'] as const;
+export const SUPPORTED_EXPRESSIONS = ['|x - T|^2', '|x - T|^2 (linearized)', '|x - T|', 'max(|x - T|)', 'x >= T', 'x <= T', 'x > T', 'x < T', 'x = T'] as const;
 export const SUPPORTED_SPECIAL_TARGETS = ['floor(AVG_SHIFTS_PER_PERSON)', 'ceil(AVG_SHIFTS_PER_PERSON)', 'round(AVG_SHIFTS_PER_PERSON)'] as const;
 
 export interface BasePreference {
@@ -123,6 +123,12 @@ export interface ShiftAffinityPreference extends BasePreference {
   weight: number;
 }
 
+// Optional CP-SAT solver configuration of a scenario, which is not edited in the UI
+export interface SolverConfig {
+  profile?: string;  // Solver profile name, e.g., 'fast-feasible', 'balanced', or 'prove-optimal'
+  parameters?: Record<string, unknown>;  // Raw CP-SAT parameter overrides
+}
+
 // Union type for all preference types in the flattened structure
 export type Preference =
   | AtMostOneShiftPerDayPreference